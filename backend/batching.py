@@ -0,0 +1,116 @@
+# batching.py
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import model_registry
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+# Clips up to one Whisper window (30s) are decoded together; longer audio
+# still goes through model.transcribe on its own.
+TRANSCRIBE_BATCH_SIZE = int(os.environ.get("TRANSCRIBE_BATCH_SIZE", "8"))
+TRANSCRIBE_BATCH_WINDOW_MS = int(os.environ.get("TRANSCRIBE_BATCH_WINDOW_MS", "50"))
+BATCH_MAX_SECONDS = 30
+SAMPLE_RATE = 16000
+
+# -----------------------------------------
+# BATCH DECODE
+# -----------------------------------------
+def decode_batch(audios, model_name=None):
+    """One forward pass over a list of <=30s 16 kHz mono float32 clips."""
+    import torch
+    import whisper
+
+    with model_registry.acquire(model_name) as model:
+        mels = [
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(a), model.dims.n_mels).to(model.device)
+            for a in audios
+        ]
+        options = whisper.DecodingOptions(fp16=model.device.type == "cuda")
+        results = whisper.decode(model, torch.stack(mels), options)
+
+    return [(r.text or "").strip() for r in results]
+
+# -----------------------------------------
+# BATCHER
+# -----------------------------------------
+class TranscriptionBatcher:
+    """
+    Collects clips submitted from many threads and decodes them together:
+    a batch closes after `batch_size` clips or `window_ms` after its first
+    clip arrived, whichever comes first.
+    """
+
+    def __init__(self, decode=decode_batch, batch_size=TRANSCRIBE_BATCH_SIZE,
+                 window_ms=TRANSCRIBE_BATCH_WINDOW_MS, workers=None):
+        self.decode = decode
+        self.batch_size = max(1, batch_size)
+        self.window = window_ms / 1000.0
+        self._pending = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._run, daemon=True, name=f"whisper-batch-{i}")
+            for i in range(workers or model_registry.WHISPER_POOL_SIZE)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, audio):
+        fut = Future()
+        self._pending.put((audio, fut))
+        return fut
+
+    def transcribe(self, audio):
+        return self.submit(audio).result()
+
+    def _collect(self):
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                texts = self.decode([audio for audio, _ in batch])
+                for (_, fut), text in zip(batch, texts):
+                    fut.set_result(text)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+
+_batchers = {}   # model name -> TranscriptionBatcher
+_batcher_lock = threading.Lock()
+
+
+def get_batcher(model_name=None):
+    name = model_name or model_registry.WHISPER_MODEL
+    batcher = _batchers.get(name)
+    if batcher is None:
+        with _batcher_lock:
+            batcher = _batchers.get(name)
+            if batcher is None:
+                batcher = TranscriptionBatcher(decode=lambda audios: decode_batch(audios, name))
+                _batchers[name] = batcher
+    return batcher
+
+
+def enabled():
+    return TRANSCRIBE_BATCH_SIZE > 1
+
+
+def fits(audio):
+    return len(audio) <= BATCH_MAX_SECONDS * SAMPLE_RATE
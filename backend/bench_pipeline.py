@@ -0,0 +1,278 @@
+# bench_pipeline.py
+"""
+Reproducible benchmarks for the process_audio pipeline.
+
+    python bench_pipeline.py                      # full run, JSON on stdout
+    python bench_pipeline.py --quick -o bench.json
+
+Whisper and Ollama are stubbed (transcripts are synthesized from the
+trimmed clip length, and the synthetic WAVs are decoded with the wave
+module instead of Whisper's ffmpeg loader) so the numbers cover our own
+code, pre-processing included, need neither package installed, and are
+comparable across commits and machines of the same class.
+"""
+import os
+import sys
+import json
+import math
+import time
+import wave
+import random
+import shutil
+import struct
+import argparse
+import contextlib
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+
+import preprocess
+import process_audio
+import result_cache
+import vocabulary
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+SEED = 1234
+TRANSCRIPT_WORDS = [200, 2000, 20000]
+AUDIO_SECONDS = [5, 30, 120]
+EXCEL_ROWS = [1000, 10000, 100000]
+WORDS_PER_SECOND = 2.5   # conversational speech rate used to size stub transcripts
+
+FILLER = (
+    "the a we you i it is was to of and for on that this with can will "
+    "please okay yes no sir madam today tomorrow week month number account"
+).split()
+
+# -----------------------------------------
+# SYNTHETIC DATA
+# -----------------------------------------
+def synthetic_transcript(n_words, rng):
+    """Filler speech with ~1 in 8 words drawn from the live vocabularies."""
+    vocab = vocabulary.current()
+    keywords = list(vocab.hindi_map) + vocab.conversion
+    for kws in list(vocab.intents.values()) + list(vocab.sentiment.values()) + list(vocab.summary.values()):
+        keywords.extend(kws)
+
+    words = []
+    for i in range(n_words):
+        words.append(rng.choice(keywords) if rng.random() < 0.125 else rng.choice(FILLER))
+        if i % 12 == 11:
+            words[-1] += rng.choice([".", "?", "!"])
+    return " ".join(words) + "."
+
+
+def synthetic_wav(path, seconds, rng, rate=16000):
+    """Mono 16-bit tone bursts separated by near-silence."""
+    frames = bytearray()
+    freq = rng.choice([180, 220, 260])
+    for n in range(int(seconds * rate)):
+        t = n / rate
+        voiced = (t % 2.0) < 1.4
+        amp = 8000 if voiced else 40
+        frames += struct.pack("<h", int(amp * math.sin(2 * math.pi * freq * t)))
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+    return path
+
+
+def read_wav(path):
+    """Decode a synthetic_wav file the way preprocess.load_audio would (16 kHz mono float32)."""
+    with wave.open(path, "rb") as w:
+        data = w.readframes(w.getnframes())
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+# -----------------------------------------
+# MEASUREMENT
+# -----------------------------------------
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    if lo == hi:
+        return sorted_values[lo]
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn, iterations, warmup=1):
+    """Latency stats in ms plus throughput (ops/s) over `iterations` calls."""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "throughput_per_s": round(iterations / total, 2) if total else None,
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "p50_ms": round(_percentile(samples, 50), 4),
+        "p95_ms": round(_percentile(samples, 95), 4),
+        "p99_ms": round(_percentile(samples, 99), 4),
+    }
+
+# -----------------------------------------
+# BENCHMARKS
+# -----------------------------------------
+def bench_text(rng, iterations):
+    results = {}
+    for n in TRANSCRIPT_WORDS:
+        text = synthetic_transcript(n, rng)
+        normalized = process_audio.normalize_language(text)
+        reps = max(10, iterations * 200 // n)
+        results[f"{n}_words"] = {
+            "normalize_language": measure(lambda: process_audio.normalize_language(text), reps),
+            "detect_intents": measure(lambda: process_audio.detect_intents(normalized), reps),
+            "analyze_sentiment": measure(lambda: process_audio.analyze_sentiment(text), reps),
+            "local_summary": measure(lambda: process_audio.local_summary(text), reps),
+        }
+    return results
+
+
+def _prefill_workbook(path, rows):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["file", "call_id", "processed_at", "summary", "sentiment", "intents", "converted"])
+    for i in range(rows):
+        ws.append([f"f{i}.wav", f"f{i}", "2025-01-01T00:00:00Z", "summary text", "neutral", '["general_call"]', False])
+    wb.save(path)
+
+
+def bench_excel(workdir, row_counts, iterations):
+    results = {}
+    row = {
+        "file": "bench.wav",
+        "call_id": "bench",
+        "processed_at": "2025-01-01T00:00:00Z",
+        "summary": "Call Purpose:\n- benchmark",
+        "sentiment": "neutral",
+        "intents": '["general_call"]',
+        "converted": False,
+    }
+    for rows in row_counts:
+        path = os.path.join(workdir, f"bench_{rows}.xlsx")
+        _prefill_workbook(path, rows)
+        results[f"{rows}_rows"] = {
+            "write_excel": measure(lambda: process_audio.write_excel(path, row), iterations),
+            # one flush folds every pending row into the workbook
+            "flush_excel": measure(lambda: (process_audio.write_excel(path, row), process_audio.flush_excel(path)),
+                                   max(2, iterations // 20), warmup=0),
+        }
+    return results
+
+
+def bench_full_pipeline(workdir, rng, iterations):
+    """process_uploaded_audio end to end with Whisper/Ollama stubbed."""
+    real_transcribe = process_audio.transcribe_audio
+    real_summary = process_audio.ollama_summary
+    real_load = preprocess.load_audio
+
+    def stub_transcribe(audio, model_name=None):
+        # audio has been through preprocess (decoded + silence trimmed)
+        seconds = len(audio) / preprocess.SAMPLE_RATE
+        text = synthetic_transcript(int(seconds * WORDS_PER_SECOND), random.Random(len(audio)))
+        return {"text": text, "segments": [{"start": 0.0, "end": round(seconds, 2), "text": text}]}
+
+    process_audio.transcribe_audio = stub_transcribe
+    process_audio.ollama_summary = lambda text: ""
+    preprocess.load_audio = read_wav
+    try:
+        results = {}
+        for seconds in AUDIO_SECONDS:
+            clip = synthetic_wav(os.path.join(workdir, f"clip_{seconds}s.wav"), seconds, rng)
+            counter = iter(range(10 ** 9))
+            # a unique hash per run keeps the result cache out of the measurement
+            results[f"{seconds}s_audio"] = measure(
+                lambda: process_audio.process_uploaded_audio(clip, f"bench-{seconds}-{next(counter)}"),
+                iterations,
+            )
+        return results
+    finally:
+        process_audio.transcribe_audio = real_transcribe
+        process_audio.ollama_summary = real_summary
+        preprocess.load_audio = real_load
+
+# -----------------------------------------
+# MAIN
+# -----------------------------------------
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the process_audio pipeline")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, excel up to 10k rows")
+    parser.add_argument("--iterations", type=int, default=None)
+    parser.add_argument("--excel-rows", default=None, help="comma separated, e.g. 1000,10000")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    iterations = args.iterations or (20 if args.quick else 100)
+    if args.excel_rows:
+        excel_rows = [int(r) for r in args.excel_rows.split(",")]
+    else:
+        excel_rows = EXCEL_ROWS[:2] if args.quick else EXCEL_ROWS
+
+    rng = random.Random(SEED)
+    workdir = tempfile.mkdtemp(prefix="voiceai_bench_")
+
+    # keep every artifact inside the scratch dir
+    process_audio.RESULTS_DIR = os.path.join(workdir, "results")
+    process_audio.EXCEL_FILE = os.path.join(process_audio.RESULTS_DIR, "analytics_results.xlsx")
+    process_audio.CONVERTED_EXCEL_FILE = os.path.join(process_audio.RESULTS_DIR, "converted_calls.xlsx")
+    process_audio.SALES_CRM_FILE = os.path.join(process_audio.RESULTS_DIR, "sales_crm.xlsx")
+    process_audio.TRANSCRIPT_DIR = os.path.join(workdir, "transcripts")
+    process_audio.EXCEL_MIRROR = True
+    result_cache.RESULT_CACHE_DIR = os.path.join(workdir, "cache")
+
+    # pipeline log lines go to stderr so stdout stays valid JSON
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            report = {
+                "commit": _git_commit(),
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": SEED,
+                "vocab_version": vocabulary.current().version,
+                "benchmarks": {
+                    "text": bench_text(rng, iterations),
+                    "write_excel": bench_excel(workdir, excel_rows, iterations),
+                    "process_uploaded_audio": bench_full_pipeline(workdir, rng, iterations),
+                },
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# bulk.py
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+import zipfile
+from collections import OrderedDict
+
+from uploads import UploadTooLarge, UPLOAD_CHUNK_SIZE, MAX_UPLOAD_MB, remove_quietly
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+BULK_MAX_FILES = int(os.environ.get("BULK_MAX_FILES", "1000"))        # per batch, archive members included
+MAX_ARCHIVE_MB = int(os.environ.get("MAX_ARCHIVE_MB", "4096"))
+BULK_CONCURRENCY = max(1, int(os.environ.get("BULK_CONCURRENCY", "2")))  # job-queue slots one batch may hold
+BULK_INSERT_BATCH = max(1, int(os.environ.get("BULK_INSERT_BATCH", "50")))
+BULK_FLUSH_SECONDS = float(os.environ.get("BULK_FLUSH_SECONDS", "5"))
+BATCH_RETENTION = int(os.environ.get("BATCH_RETENTION", "100"))
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".ogg", ".oga", ".flac", ".aac", ".webm", ".mp4", ".opus"}
+
+# -----------------------------------------
+# ARCHIVES
+# -----------------------------------------
+def is_archive(filename):
+    return (filename or "").lower().endswith(".zip")
+
+
+def is_audio(filename):
+    return os.path.splitext(filename or "")[1].lower() in AUDIO_EXTENSIONS
+
+
+def archive_members(path):
+    """
+    Audio members of a zip, in archive order. Raises zipfile.BadZipFile.
+    Member names are never used as paths (see extract_member), so
+    "../" entries can't escape the temp dir.
+    """
+    with zipfile.ZipFile(path) as zf:
+        return [
+            info for info in zf.infolist()
+            if not info.is_dir()
+            and is_audio(info.filename)
+            and not os.path.basename(info.filename).startswith(".")   # __MACOSX/._foo.wav
+        ]
+
+
+def extract_member(archive_path, info, dest, max_bytes=None):
+    """
+    Copy one member to `dest`, returning (size_bytes, sha256_hex). The
+    size limit is enforced on the bytes actually inflated, not on the
+    size the archive claims.
+    """
+    limit = max_bytes if max_bytes is not None else MAX_UPLOAD_MB * 1024 * 1024
+    if info.file_size > limit:
+        raise UploadTooLarge(f"{info.filename} exceeds {limit // (1024 * 1024)} MB")
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with zipfile.ZipFile(archive_path) as zf, zf.open(info) as src, open(dest, "wb") as f:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge(f"{info.filename} exceeds {limit // (1024 * 1024)} MB")
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        remove_quietly(dest)
+        raise
+
+    return size, digest.hexdigest()
+
+# -----------------------------------------
+# BATCHED INSERTS
+# -----------------------------------------
+class CallBuffer:
+    """
+    Collects call documents from a batch's jobs and hands them to
+    `store(docs)` (one insert_many) every BULK_INSERT_BATCH documents or
+    BULK_FLUSH_SECONDS, whichever comes first. `store` returns
+    {call_id: error} for rejected documents.
+    """
+
+    def __init__(self, store, size=BULK_INSERT_BATCH, max_wait=BULK_FLUSH_SECONDS):
+        self.store = store
+        self.size = size
+        self.max_wait = max_wait
+        self._pending = []    # (doc, file entry)
+        self._since = None
+        self._lock = asyncio.Lock()
+
+    async def add(self, doc, entry):
+        if not self._pending:
+            self._since = time.monotonic()
+        self._pending.append((doc, entry))
+        if len(self._pending) >= self.size or time.monotonic() - self._since >= self.max_wait:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            try:
+                errors = await self.store([doc for doc, _ in pending])
+            except Exception as e:
+                errors = {doc["call_id"]: str(e) for doc, _ in pending}
+
+            for doc, entry in pending:
+                error = errors.get(doc["call_id"])
+                entry["status"] = "failed" if error else "done"
+                entry["error"] = error
+
+# -----------------------------------------
+# BATCH RECORDS
+# -----------------------------------------
+class BatchRegistry:
+    """In-memory batch status, like JobQueue.jobs; the oldest finished batches are dropped."""
+
+    def __init__(self, retention=BATCH_RETENTION):
+        self.retention = retention
+        self.batches = OrderedDict()
+        self._tasks = set()
+
+    def create(self, filenames):
+        batch_id = uuid.uuid4().hex
+        self.batches[batch_id] = {
+            "batch_id": batch_id,
+            "status": "running",
+            "created_at": time.time(),
+            "finished_at": None,
+            "files": [
+                {"file": name, "status": "pending", "call_id": None, "error": None}
+                for name in filenames
+            ],
+        }
+        self._evict()
+        return self.batches[batch_id]
+
+    def get(self, batch_id):
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return None
+        counts = {}
+        for entry in batch["files"]:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return {**batch, "total": len(batch["files"]), "counts": counts}
+
+    def run(self, coro):
+        # keep a reference: the loop only holds weak ones to running tasks
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def stop(self):
+        for t in list(self._tasks):
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _evict(self):
+        finished = [b for b, rec in self.batches.items() if rec["status"] == "done"]
+        for batch_id in finished[: max(0, len(self.batches) - self.retention)]:
+            self.batches.pop(batch_id, None)
@@ -0,0 +1,189 @@
+# exports.py
+import io
+import os
+import re
+import csv
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+import openpyxl
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_COLUMNS = [
+    "call_id",
+    "created_at",
+    "customer_id",
+    "sentiment",
+    "tags",
+    "converted",
+    "sales_call",
+    "summary",
+]
+EXPORT_PROJECTION = {c: 1 for c in EXPORT_COLUMNS}
+
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$")
+
+# -----------------------------------------
+# QUERY
+# -----------------------------------------
+def build_query(start=None, end=None, sentiment=None, tag=None, sales_only=False):
+    """
+    start/end are dates (end inclusive) or datetimes (end exclusive).
+    """
+    query = {}
+
+    created = {}
+    if start is not None:
+        created["$gte"] = _as_datetime(start)
+    if end is not None:
+        end_dt = _as_datetime(end)
+        if not isinstance(end, datetime):
+            end_dt += timedelta(days=1)
+        created["$lt"] = end_dt
+    if created:
+        query["created_at"] = created
+
+    if sentiment:
+        query["sentiment"] = sentiment.lower()
+
+    sales_filter = {"tags": {"$regex": "_sales$"}}
+    if tag and sales_only:
+        query["$and"] = [{"tags": tag}, sales_filter]
+    elif tag:
+        query["tags"] = tag
+    elif sales_only:
+        query.update(sales_filter)
+
+    return query
+
+
+def _as_datetime(d):
+    if isinstance(d, datetime):
+        return d
+    return datetime(d.year, d.month, d.day)
+
+
+def find_calls(db, query, projection=None):
+    return (
+        db.calls.find(query, projection or EXPORT_PROJECTION)
+        .sort("created_at", -1)
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+
+def field_projection(fields):
+    """
+    "call_id,summary,analysis.intents" -> Mongo projection, or None when
+    no fields were asked for. Raises ValueError on a malformed name.
+    """
+    names = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    if not names:
+        return None
+    for name in names:
+        if not _FIELD_RE.match(name):
+            raise ValueError(f"Invalid field name: {name!r}")
+    projection = {name: 1 for name in names}
+    if "_id" not in projection:
+        projection["_id"] = 0
+    return projection
+
+# -----------------------------------------
+# ROW FORMATTING
+# -----------------------------------------
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat() + "Z"
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    if value is None:
+        return ""
+    return value
+
+
+def to_row(doc):
+    return [_cell(doc.get(c)) for c in EXPORT_COLUMNS]
+
+# -----------------------------------------
+# CSV (streamed row by row)
+# -----------------------------------------
+async def iter_csv(cursor):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    writer.writerow(EXPORT_COLUMNS)
+    async for doc in cursor:
+        writer.writerow(to_row(doc))
+        if buf.tell() >= EXPORT_CHUNK_SIZE:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+
+    yield buf.getvalue()
+
+# -----------------------------------------
+# NDJSON (one document per line, streamed)
+# -----------------------------------------
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat() + "Z"
+    return str(value)
+
+
+async def iter_ndjson(cursor):
+    buf = io.StringIO()
+    async for doc in cursor:
+        buf.write(json.dumps(doc, default=_json_default, ensure_ascii=False))
+        buf.write("\n")
+        if buf.tell() >= EXPORT_CHUNK_SIZE:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+
+    yield buf.getvalue()
+
+# -----------------------------------------
+# XLSX (write-only workbook spooled to a temp file)
+# -----------------------------------------
+async def fill_xlsx(cursor):
+    """
+    Rows go straight into a write-only worksheet, which openpyxl spools
+    to disk, so memory stays flat. Saving zips the spooled sheet and is
+    blocking: run save_xlsx() in a thread.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("calls")
+    ws.append(EXPORT_COLUMNS)
+
+    async for doc in cursor:
+        ws.append(to_row(doc))
+
+    return wb
+
+
+def save_xlsx(wb):
+    """Write the workbook to a temp file and return its path; the caller owns it."""
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=".xlsx")
+    os.close(fd)
+    wb.save(path)
+    return path
+
+
+def iter_file(path):
+    """Yield a file in chunks, deleting it once fully sent (or abandoned)."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,176 @@
+# jobs.py
+import os
+import time
+import uuid
+import asyncio
+import itertools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import metrics
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+JOB_WORKERS = max(1, int(os.environ.get("JOB_WORKERS", "2")))
+JOB_QUEUE_SIZE = max(1, int(os.environ.get("JOB_QUEUE_SIZE", "50")))
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", "1000"))   # finished jobs kept for polling
+
+# Shortest job first: a job's cost is its audio length in seconds (jobs
+# without one count as DEFAULT_JOB_COST). Every second spent waiting
+# takes JOB_AGING_RATE seconds off the cost, so at the default a long
+# recording waits at most about its own length behind shorter arrivals.
+DEFAULT_JOB_COST = float(os.environ.get("DEFAULT_JOB_COST", "60"))
+JOB_AGING_RATE = float(os.environ.get("JOB_AGING_RATE", "1.0"))
+
+# Size classes for wait-time reporting: (name, max cost)
+JOB_CLASSES = [("short", 120), ("medium", 900), ("long", float("inf"))]
+
+# Max concurrent calls inside a pipeline stage, across all workers
+STAGE_LIMITS = {
+    "transcribe": max(1, int(os.environ.get("TRANSCRIBE_CONCURRENCY", "1"))),
+    "summary": max(1, int(os.environ.get("SUMMARY_CONCURRENCY", "2"))),
+    "live_transcribe": max(1, int(os.environ.get("LIVE_TRANSCRIBE_CONCURRENCY", "2"))),
+}
+
+# -----------------------------------------
+# STAGE CONCURRENCY
+# -----------------------------------------
+_stage_slots = {name: threading.BoundedSemaphore(n) for name, n in STAGE_LIMITS.items()}
+
+
+@contextmanager
+def stage(name):
+    """Hold one of the stage's slots while running it (no-op for unknown stages)."""
+    slot = _stage_slots.get(name)
+    if slot is None:
+        yield
+        return
+    with slot:
+        yield
+
+# -----------------------------------------
+# JOB QUEUE
+# -----------------------------------------
+class QueueFull(Exception):
+    pass
+
+
+def size_class(cost):
+    for name, limit in JOB_CLASSES:
+        if cost <= limit:
+            return name
+    return JOB_CLASSES[-1][0]
+
+
+class JobQueue:
+    """
+    Bounded queue drained by a fixed number of asyncio workers.
+    submit() never blocks: it raises QueueFull once JOB_QUEUE_SIZE jobs
+    are waiting, so callers can answer with 429.
+
+    Waiting jobs start cheapest first, with aging: the priority
+    cost - aging_rate * waited orders the same as the fixed key
+    cost + aging_rate * enqueued_at, so it never has to be recomputed.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, maxsize=JOB_QUEUE_SIZE, retention=JOB_RETENTION,
+                 aging_rate=JOB_AGING_RATE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.retention = retention
+        self.aging_rate = aging_rate
+        self.jobs = OrderedDict()
+        self.in_flight = 0
+        self._queue = None
+        self._tasks = []
+        self._futures = {}
+        self._seq = itertools.count()   # FIFO among equal keys
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def depth(self):
+        return self._queue.qsize() if self._queue else 0
+
+    def submit(self, handler, *args, cost=None):
+        """Queue `await handler(*args)`; returns the job id. `cost`: audio seconds, if known."""
+        if self._queue is None:
+            raise RuntimeError("JobQueue not started")
+
+        job_id = uuid.uuid4().hex
+        cost = DEFAULT_JOB_COST if cost is None else cost
+        now = time.time()
+        key = cost + self.aging_rate * now
+        try:
+            self._queue.put_nowait((key, next(self._seq), job_id, handler, args))
+        except asyncio.QueueFull:
+            metrics.QUEUE_REJECTED.inc()
+            raise QueueFull(f"{self.maxsize} jobs already queued")
+
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "cost_seconds": round(cost, 2),
+            "size_class": size_class(cost),
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        self._futures[job_id] = asyncio.get_running_loop().create_future()
+        self._evict()
+        return job_id
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id):
+        """Wait for a job to finish; re-raises its exception."""
+        return await asyncio.shield(self._futures[job_id])
+
+    def _evict(self):
+        finished = [j for j, rec in self.jobs.items() if rec["status"] in ("done", "failed")]
+        for job_id in finished[: max(0, len(self.jobs) - self.retention)]:
+            self.jobs.pop(job_id, None)
+            self._futures.pop(job_id, None)
+
+    async def _worker(self):
+        while True:
+            _, _, job_id, handler, args = await self._queue.get()
+            rec = self.jobs[job_id]
+            fut = self._futures[job_id]
+            rec["status"] = "running"
+            rec["started_at"] = time.time()
+            metrics.JOB_WAIT_SECONDS.observe(rec["started_at"] - rec["created_at"], size=rec["size_class"])
+            self.in_flight += 1
+            try:
+                result = await handler(*args)
+                rec["status"] = "done"
+                metrics.JOBS.inc(status="done")
+                rec["result"] = result
+                if not fut.done():
+                    fut.set_result(result)
+            except Exception as e:
+                rec["status"] = "failed"
+                metrics.JOBS.inc(status="failed")
+                rec["error"] = str(e)
+                if not fut.done():
+                    fut.set_exception(e)
+                    fut.exception()   # retrieved: async-mode jobs are never awaited
+            finally:
+                rec["finished_at"] = time.time()
+                self.in_flight -= 1
+                self._queue.task_done()
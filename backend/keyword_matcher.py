@@ -0,0 +1,113 @@
+# keyword_matcher.py
+from collections import deque
+
+# -----------------------------------------
+# AHO-CORASICK MATCHER
+# -----------------------------------------
+class KeywordMatcher:
+    """
+    Finds every occurrence of every keyword in one left-to-right pass,
+    so matching cost is O(len(text) + hits) however many keywords there are.
+
+    Keywords are grouped:
+
+        m = KeywordMatcher({"positive": ["good", "great"], "negative": ["bad"]})
+        m.find_all("good, not bad")
+        # [(0, 4, "good", "positive"), (10, 13, "bad", "negative")]
+
+    A keyword listed in several groups produces one hit per group.
+    Matching is case-sensitive; lowercase text and keywords beforehand.
+    """
+
+    def __init__(self, groups):
+        self.groups = {g: list(dict.fromkeys(k for k in kws if k)) for g, kws in groups.items()}
+
+        # state 0 is the root; goto[s] maps a char to the next state
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]   # (keyword, group) pairs ending at this state
+
+        pending = {}
+        for group, keywords in self.groups.items():
+            for kw in keywords:
+                state = self._insert(kw)
+                pending.setdefault(state, []).append((kw, group))
+        for state, outs in pending.items():
+            self._out[state] = tuple(outs)
+
+        self._build_fail_links()
+
+    def _insert(self, keyword):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        return state
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                # inherit matches that end here through the suffix link
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text):
+        """All (start, end, keyword, group) hits, overlapping ones included."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = i + 1
+                for kw, group in out[state]:
+                    hits.append((end - len(kw), end, kw, group))
+        return hits
+
+    def replace(self, text, replacements):
+        """
+        Replace keywords using leftmost-longest, non-overlapping matches.
+        `replacements` maps keyword -> replacement text.
+        """
+        hits = sorted(
+            {(s, e, kw) for s, e, kw, _ in self.find_all(text) if kw in replacements},
+            key=lambda h: (h[0], -(h[1] - h[0])),
+        )
+        parts = []
+        pos = 0
+        for start, end, kw in hits:
+            if start < pos:
+                continue
+            parts.append(text[pos:start])
+            parts.append(replacements[kw])
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts)
+
+# -----------------------------------------
+# HIT HELPERS
+# -----------------------------------------
+def group_hits(hits):
+    """{group: [hit, ...]} in text order."""
+    grouped = {}
+    for hit in hits:
+        grouped.setdefault(hit[3], []).append(hit)
+    return grouped
+
+
+def distinct_keywords(hits):
+    return {hit[2] for hit in hits}
@@ -0,0 +1,159 @@
+# long_audio.py
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import model_registry
+from preprocess import frame_rms
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+# Recordings at least this long are split at pauses and transcribed
+# segment by segment across LONG_AUDIO_WORKERS processes, each holding
+# its own copy of the model (so budget RAM for that many models).
+LONG_AUDIO_MIN_SECONDS = float(os.environ.get("LONG_AUDIO_MIN_SECONDS", "300"))
+LONG_AUDIO_WORKERS = int(os.environ.get("LONG_AUDIO_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+SEGMENT_MIN_SECONDS = 45
+SEGMENT_MAX_SECONDS = 120
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+SMOOTH_FRAMES = 10    # ~300 ms: cut inside a pause, not between two syllables
+
+# -----------------------------------------
+# SPLITTING
+# -----------------------------------------
+def split_at_silences(audio, sr=SAMPLE_RATE, min_seconds=SEGMENT_MIN_SECONDS, max_seconds=SEGMENT_MAX_SECONDS):
+    """
+    [(start, end)] sample ranges covering `audio`, each at most
+    max_seconds long. Every cut is placed at the quietest point between
+    min_seconds and max_seconds into the current segment.
+    """
+    frame = int(sr * FRAME_SECONDS)
+    energy = frame_rms(audio, frame)
+    if len(energy) >= SMOOTH_FRAMES:
+        energy = np.convolve(energy, np.ones(SMOOTH_FRAMES) / SMOOTH_FRAMES, mode="same")
+
+    max_len = int(max_seconds * sr)
+    min_frames = int(min_seconds / FRAME_SECONDS)
+    max_frames = int(max_seconds / FRAME_SECONDS)
+
+    bounds = []
+    start = 0
+    while len(audio) - start > max_len:
+        first = start // frame + min_frames
+        window = energy[first: start // frame + max_frames]
+        if len(window):
+            cut = (first + _quietest(window)) * frame + frame // 2
+        else:
+            cut = start + max_len
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(audio)))
+    return bounds
+
+
+def _quietest(window):
+    """Middle of the quiet run around the window's minimum."""
+    i = int(np.argmin(window))
+    quiet = window <= window[i] * 1.1 + 1e-4
+    lo = hi = i
+    while lo > 0 and quiet[lo - 1]:
+        lo -= 1
+    while hi < len(window) - 1 and quiet[hi + 1]:
+        hi += 1
+    return (lo + hi) // 2
+
+# -----------------------------------------
+# WORKERS (separate processes)
+# -----------------------------------------
+_worker_model = None
+
+
+def _init_worker(model_name, threads):
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)   # don't let N workers each grab every core
+    except ImportError:
+        pass
+    _worker_model = model_name
+    model_registry.warm_up(model_name, pool_size=1)
+
+
+def _transcribe_segment(offset_seconds, audio):
+    with model_registry.acquire(_worker_model) as model:
+        result = model.transcribe(audio)
+
+    segments = [
+        {
+            "start": round(offset_seconds + s["start"], 2),
+            "end": round(offset_seconds + s["end"], 2),
+            "text": s["text"],
+        }
+        for s in result.get("segments") or []
+    ]
+    return (result.get("text") or "").strip(), segments
+
+# -----------------------------------------
+# POOL
+# -----------------------------------------
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def _get_pool(model_name):
+    pool = _pools.get(model_name)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(model_name)
+            if pool is None:
+                threads = max(1, (os.cpu_count() or 1) // LONG_AUDIO_WORKERS)
+                pool = ProcessPoolExecutor(
+                    max_workers=LONG_AUDIO_WORKERS,
+                    # spawn: forking a process that already runs torch threads can hang
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(model_name, threads),
+                )
+                _pools[model_name] = pool
+    return pool
+
+
+def enabled():
+    return LONG_AUDIO_WORKERS > 1
+
+
+def is_long(audio, sr=SAMPLE_RATE):
+    return len(audio) >= LONG_AUDIO_MIN_SECONDS * sr
+
+
+def transcribe(audio, model_name=None, sr=SAMPLE_RATE):
+    """
+    Transcribe a long 16 kHz mono recording segment-parallel. Returns a
+    model.transcribe()-shaped dict: the stitched "text" and "segments"
+    with timestamps relative to the start of `audio` (the trimmed
+    buffer; process_audio.recording_segments maps them back).
+    """
+    pool = _get_pool(model_name or model_registry.WHISPER_MODEL)
+    futures = [
+        pool.submit(_transcribe_segment, start / sr, audio[start:end])
+        for start, end in split_at_silences(audio, sr)
+    ]
+    parts = [f.result() for f in futures]   # submission order = recording order
+
+    return {
+        "text": " ".join(text for text, _ in parts if text),
+        "segments": [s for _, segments in parts for s in segments],
+    }
+
+
+def shutdown():
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
@@ -0,0 +1,147 @@
+# metrics.py
+import threading
+
+# -----------------------------------------
+# METRIC TYPES (Prometheus text exposition)
+# -----------------------------------------
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_label_str(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Either set() directly or give `fn` to read the value at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, help, fn=None):
+        super().__init__(name, help)
+        self.fn = fn
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    def _samples(self):
+        value = self.fn() if self.fn else self._value
+        return [f"{self.name} {_fmt(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}   # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                labels = _label_str(self.labelnames, key, ("le", _fmt(bound)))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _label_str(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+def render():
+    return "\n\n".join(m.render() for m in _registry) + "\n"
+
+# -----------------------------------------
+# VOICE AI METRICS
+# -----------------------------------------
+STAGE_SECONDS = Histogram(
+    "voiceai_stage_seconds",
+    "Time spent per pipeline stage (upload_write, probe, whisper_load, preprocess, transcribe, normalize, "
+    "intents, summary, write_excel, mongo_insert, ...)",
+    ["stage"],
+)
+FALLBACKS = Counter(
+    "voiceai_fallbacks_total",
+    "Degraded results by reason (ollama_timeout, ollama_error, ollama_circuit_open, local_summary, empty_transcript, model_downgraded)",
+    ["reason"],
+)
+TRIMMED_SECONDS = Counter("voiceai_trimmed_audio_seconds_total", "Seconds of silence removed before transcription")
+JOB_WAIT_SECONDS = Histogram(
+    "voiceai_job_wait_seconds",
+    "Time from enqueue to start by job size class (short, medium, long)",
+    ["size"],
+)
+JOBS = Counter("voiceai_jobs_total", "Finished jobs by outcome", ["status"])
+QUEUE_REJECTED = Counter("voiceai_queue_rejected_total", "Uploads refused with 429 because the queue was full")
+QUEUE_DEPTH = Gauge("voiceai_queue_depth", "Jobs waiting for a worker")
+IN_FLIGHT = Gauge("voiceai_jobs_in_flight", "Jobs currently being processed")
@@ -0,0 +1,116 @@
+# model_registry.py
+import os
+import time
+import queue
+import threading
+from contextlib import contextmanager
+
+import metrics
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "small")
+WHISPER_POOL_SIZE = max(1, int(os.environ.get("WHISPER_POOL_SIZE", "1")))
+
+# -----------------------------------------
+# REGISTRY STATE
+# -----------------------------------------
+# (name, pool) -> {"pool": Queue of loaded models, "stats": {...}}
+# `pool` separates copies of the same model reserved for one kind of work
+# (e.g. "live"), so it never waits for copies another kind is using.
+_registry = {}
+_lock = threading.Lock()
+
+
+def _model_size_bytes(model):
+    """Resident size of the weights (parameters + buffers)."""
+    try:
+        params = sum(p.numel() * p.element_size() for p in model.parameters())
+        buffers = sum(b.numel() * b.element_size() for b in model.buffers())
+        return params + buffers
+    except Exception:
+        return 0
+
+
+def _load(name):
+    import whisper
+
+    start = time.perf_counter()
+    model = whisper.load_model(name)
+    took = time.perf_counter() - start
+    metrics.STAGE_SECONDS.observe(took, stage="whisper_load")
+    return model, took
+
+
+def _get_entry(name, pool_size=None, pool_name=None):
+    """
+    Load `name` once per pool (pool_size copies) and cache it
+    process-wide. Later calls return the same entry without touching disk.
+    """
+    key = (name, pool_name)
+    entry = _registry.get(key)
+    if entry is not None:
+        return entry
+
+    with _lock:
+        entry = _registry.get(key)
+        if entry is not None:
+            return entry
+
+        size = pool_size or WHISPER_POOL_SIZE
+        pool = queue.Queue()
+        load_times = []
+        resident = 0
+        for _ in range(size):
+            model, took = _load(name)
+            load_times.append(took)
+            resident += _model_size_bytes(model)
+            pool.put(model)
+
+        entry = {
+            "pool": pool,
+            "stats": {
+                "model": name,
+                "pool": pool_name or "default",
+                "pool_size": size,
+                "load_seconds": round(sum(load_times), 3),
+                "resident_bytes": resident,
+                "loaded_at": time.time(),
+            },
+        }
+        _registry[key] = entry
+        label = f"{name}/{pool_name}" if pool_name else name
+        print(f"✅ Whisper '{label}' loaded x{size} in {entry['stats']['load_seconds']}s")
+        return entry
+
+
+# -----------------------------------------
+# PUBLIC API
+# -----------------------------------------
+def warm_up(name=None, pool_size=None, pool=None):
+    """Load the configured model ahead of the first request."""
+    return _get_entry(name or WHISPER_MODEL, pool_size, pool)["stats"]
+
+
+@contextmanager
+def acquire(name=None, pool=None):
+    """
+    Borrow a loaded model from the pool; blocks while all copies are busy.
+
+        with model_registry.acquire() as model:
+            model.transcribe(path)
+    """
+    pool = _get_entry(name or WHISPER_MODEL, pool_name=pool)["pool"]
+    model = pool.get()
+    try:
+        yield model
+    finally:
+        pool.put(model)
+
+
+def stats():
+    return {
+        f"{name}/{pool}" if pool else name: dict(e["stats"], available=e["pool"].qsize())
+        for (name, pool), e in _registry.items()
+    }
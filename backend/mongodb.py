@@ -22,21 +22,23 @@ def get_db():
     client = get_client()
     return client[MONGO_DB_NAME]
 
+# (collection, keys, options) — everything the queries in server.py rely on
+INDEXES = [
+    ("calls", [("call_id", 1)], {"unique": True}),                      # upsert / single call lookups
+    ("calls", [("created_at", -1), ("call_id", -1)], {}),               # /calls keyset pages, newest first
+    ("calls", [("tags", 1), ("created_at", -1), ("call_id", -1)], {}),  # /calls/topic/{topic} keyset pages
+    ("calls", [("expiresAt", 1)], {"expireAfterSeconds": 0}),           # ✅ auto delete after 30 days
+    ("call_rollups", [("period", 1), ("start", -1)], {}),               # /stats/summary
+]
+
 async def ensure_indexes():
     """
-    Create required indexes on first startup.
+    Create the declared indexes; safe to run on every startup. A failure
+    (e.g. duplicate call_ids in old data) is reported and skipped.
     """
     db = get_db()
-    calls = db.calls
-    # Ensure unique index on call_id for upsert behaviour
-    await calls.create_index("call_id", unique=True)
-    # Index by created_at for fast sorting
-    await calls.create_index([("created_at", -1)])
-async def ensure_indexes():
-    db = get_db()
-
-    # ✅ WEEKLY AUTO DELETE
-    await db.calls.create_index(
-        "expiresAt",
-        expireAfterSeconds=0
-    )
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except Exception as e:
+            print(f"❌ Index {collection}{keys} not created:", e)
@@ -0,0 +1,207 @@
+# ollama_client.py
+import os
+import json
+import time
+import queue
+import threading
+import http.client
+from urllib.parse import urlparse
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434")
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.1:1b")
+OLLAMA_POOL_SIZE = int(os.environ.get("OLLAMA_POOL_SIZE", "4"))
+OLLAMA_DEADLINE_SECONDS = float(os.environ.get("OLLAMA_DEADLINE_SECONDS", "45"))
+
+# Circuit breaker: after this many consecutive failures, skip Ollama
+# entirely for the cool-down so callers fall back to local_summary at once.
+BREAKER_FAILURES = int(os.environ.get("OLLAMA_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get("OLLAMA_BREAKER_COOLDOWN_SECONDS", "60"))
+
+
+class OllamaUnavailable(Exception):
+    pass
+
+
+class OllamaTimeout(OllamaUnavailable):
+    pass
+
+# -----------------------------------------
+# CIRCUIT BREAKER
+# -----------------------------------------
+class CircuitBreaker:
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._count = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            # half-open: let one request through once the cool-down is over
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self._count = 0
+            self._opened_at = None
+
+    def failure(self):
+        with self._lock:
+            self._count += 1
+            if self._count >= self.failures:
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+# -----------------------------------------
+# CLIENT
+# -----------------------------------------
+class OllamaClient:
+    """
+    Talks to `ollama serve` over a small pool of keep-alive HTTP
+    connections. Responses are streamed, so a request can be abandoned
+    as soon as its deadline passes instead of waiting for the full reply.
+    """
+
+    def __init__(self, url=OLLAMA_URL, model=OLLAMA_MODEL, pool_size=OLLAMA_POOL_SIZE,
+                 deadline=OLLAMA_DEADLINE_SECONDS, breaker=None):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 11434
+        self.model = model
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _new_conn(self, timeout):
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _get_conn(self, timeout):
+        """Returns (connection, reused)."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_conn(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _request(self, conn, body):
+        """
+        Returns (response, socket). The socket is taken before
+        getresponse(): on `Connection: close` / HTTP/1.0 replies
+        http.client drops conn.sock while the response is still unread.
+        """
+        conn.request("POST", "/api/generate", body=body,
+                     headers={"Content-Type": "application/json"})
+        sock = conn.sock
+        return conn.getresponse(), sock
+
+    def _send(self, conn, reused, body, timeout):
+        """POST the request; a pooled connection the server already closed is retried once."""
+        try:
+            return (conn, *self._request(conn, body))
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            if not reused:
+                raise
+            conn.close()
+            conn = self._new_conn(timeout)
+            return (conn, *self._request(conn, body))
+
+    def _put_conn(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def generate(self, prompt, deadline=None):
+        """Return the generated text, or raise OllamaUnavailable / OllamaTimeout."""
+        if not self.breaker.allow():
+            raise OllamaUnavailable("circuit open")
+
+        budget = deadline if deadline is not None else self.deadline
+        expires = time.monotonic() + budget
+        body = json.dumps({"model": self.model, "prompt": prompt, "stream": True})
+
+        conn, reused = self._get_conn(timeout=budget)
+        reusable = False
+        try:
+            conn, resp, sock = self._send(conn, reused, body, budget)
+            if resp.status != 200:
+                detail = resp.read().decode("utf-8", "replace")
+                reusable = True
+                raise OllamaUnavailable(f"HTTP {resp.status}: {detail[:200]}")
+
+            tokens = []
+            while True:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    raise OllamaTimeout(f"no answer within {budget}s")
+                if sock is not None:
+                    sock.settimeout(remaining)
+
+                line = resp.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaUnavailable(chunk["error"])
+                tokens.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    resp.read()   # drain so the connection can be reused
+                    reusable = True
+                    break
+
+            self.breaker.success()
+            return "".join(tokens)
+
+        except OllamaUnavailable:
+            self.breaker.failure()
+            raise
+        except TimeoutError as e:
+            self.breaker.failure()
+            raise OllamaTimeout(str(e) or f"no answer within {budget}s")
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self.breaker.failure()
+            raise OllamaUnavailable(str(e))
+        except Exception as e:
+            # anything else is still "Ollama didn't answer": count it, let callers fall back
+            self.breaker.failure()
+            raise OllamaUnavailable(f"{type(e).__name__}: {e}")
+        finally:
+            if reusable:
+                self._put_conn(conn)
+            else:
+                conn.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+    return _client
@@ -0,0 +1,102 @@
+# pagination.py
+import os
+import json
+import base64
+from datetime import datetime
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", "200"))
+
+# Newest first; call_id breaks ties between calls stored in the same ms
+SORT = [("created_at", -1), ("call_id", -1)]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+# -----------------------------------------
+# CURSOR TOKENS
+# -----------------------------------------
+def encode_cursor(doc):
+    """Opaque token pointing just past `doc` in SORT order."""
+    created = doc["created_at"]
+    raw = json.dumps({"t": created.isoformat(), "id": doc["call_id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["t"]), str(data["id"])
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def page_size(limit):
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_query(base_query, cursor=None):
+    """
+    Restrict `base_query` to documents after `cursor` in SORT order. With
+    the (created_at, call_id) indexes this is a range seek, so page N
+    costs the same as page 1.
+    """
+    if not cursor:
+        return base_query
+
+    created, call_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"created_at": {"$lt": created}},
+        {"created_at": created, "call_id": {"$lt": call_id}},
+    ]}
+    return {"$and": [base_query, after]} if base_query else after
+
+# -----------------------------------------
+# PAGES
+# -----------------------------------------
+async def fetch_page(collection, base_query, limit, cursor=None, projection=None):
+    """
+    (docs, next_cursor) for one page. Reads limit + 1 documents so the
+    last page comes back with next_cursor=None instead of an empty page.
+    """
+    size = page_size(limit)
+    find = collection.find(keyset_query(base_query, cursor), projection).sort(SORT).limit(size + 1)
+    docs = await find.to_list(length=size + 1)
+
+    next_cursor = None
+    if len(docs) > size:
+        docs = docs[:size]
+        next_cursor = encode_cursor(docs[-1])
+    return docs, next_cursor
+
+# -----------------------------------------
+# SERIALIZATION
+# -----------------------------------------
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def call_json(doc):
+    """One call document as JSON, in the same shape the list endpoints always returned."""
+    doc["_id"] = None
+    if isinstance(doc.get("created_at"), datetime):
+        doc["created_at"] = doc["created_at"].isoformat() + "Z"
+    return json.dumps(doc, default=_json_default, ensure_ascii=False)
+
+
+def iter_json_array(docs, chunk_docs=50):
+    """Encode a page as a JSON array a few documents at a time."""
+    yield "["
+    buf = []
+    for i, doc in enumerate(docs):
+        buf.append(("," if i else "") + call_json(doc))
+        if len(buf) >= chunk_docs:
+            yield "".join(buf)
+            buf = []
+    yield "".join(buf) + "]"
@@ -0,0 +1,56 @@
+# pipeline.py
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# -----------------------------------------
+# STAGE DAG
+# -----------------------------------------
+class Stage:
+    """
+    A named step. `fn` receives a dict of its dependencies' outputs
+    ({dep_name: value}) and returns this stage's output.
+    """
+
+    def __init__(self, name, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+def _timed(stage, inputs):
+    start = time.perf_counter()
+    value = stage.fn(inputs)
+    return value, round((time.perf_counter() - start) * 1000, 2)
+
+
+def run_stages(stages, max_workers=None):
+    """
+    Run every stage as soon as all of its dependencies have finished, so
+    independent stages overlap. Returns (outputs, timings_ms), both keyed
+    by stage name. The first stage to fail re-raises its exception.
+    """
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate stage names: {names}")
+
+    pending = {s.name: s for s in stages}
+    outputs, timings = {}, {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(d in outputs for d in stage.deps):
+                    inputs = {d: outputs[d] for d in stage.deps}
+                    running[pool.submit(_timed, stage, inputs)] = name
+                    del pending[name]
+
+            if not running:
+                raise ValueError(f"unresolvable stage dependencies: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                outputs[name], timings[name] = fut.result()
+
+    return outputs, timings
@@ -0,0 +1,176 @@
+# preprocess.py
+import os
+import wave
+import subprocess
+
+import numpy as np
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+
+TRIM_SILENCE = os.environ.get("TRIM_SILENCE", "1") == "1"
+SILENCE_DBFS = float(os.environ.get("SILENCE_DBFS", "-45"))   # frames quieter than this are silence
+MAX_PAUSE_SECONDS = 1.5   # internal silences longer than this ...
+KEEP_PAUSE_SECONDS = 0.5  # ... are shortened to this
+EDGE_PAD_SECONDS = 0.25   # kept before the first / after the last speech
+
+PROBE_TIMEOUT_SECONDS = 5
+ASSUMED_BYTES_PER_SECOND = 16000   # ~128 kbps, when nothing better is known
+
+# -----------------------------------------
+# ENERGY
+# -----------------------------------------
+def frame_rms(audio, frame):
+    n = len(audio) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[: n * frame].reshape(n, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def silent_frames(audio, sr=SAMPLE_RATE):
+    """
+    Boolean per FRAME_SECONDS frame. The threshold follows the line noise
+    floor (10th percentile) so a hissy line isn't all "speech", stays well
+    under the speech level (90th percentile) so a call without pauses
+    isn't all "silence", and never drops below SILENCE_DBFS.
+    """
+    rms = frame_rms(audio, int(sr * FRAME_SECONDS))
+    if not len(rms):
+        return np.zeros(0, dtype=bool)
+    floor, speech = np.percentile(rms, [10, 90])
+    threshold = max(10 ** (SILENCE_DBFS / 20), min(floor * 2, speech * 0.1))
+    return rms < threshold
+
+# -----------------------------------------
+# TRIMMING
+# -----------------------------------------
+def kept_ranges(audio, sr=SAMPLE_RATE):
+    """
+    [(start, end)] sample ranges of `audio` that survive trimming:
+    leading/trailing silence dropped, long pauses shortened. Empty for
+    all-silent audio.
+    """
+    frame = int(sr * FRAME_SECONDS)
+    silent = silent_frames(audio, sr)
+    if not len(silent):
+        return [(0, len(audio))]
+    if silent.all():
+        return []
+
+    voiced = np.flatnonzero(~silent)
+    pad = int(EDGE_PAD_SECONDS / FRAME_SECONDS)
+    first = max(0, voiced[0] - pad)
+    last = min(len(silent), voiced[-1] + 1 + pad)
+
+    # keep runs of frames, collapsing every pause above MAX_PAUSE_SECONDS
+    max_pause = int(MAX_PAUSE_SECONDS / FRAME_SECONDS)
+    keep_pause = int(KEEP_PAUSE_SECONDS / FRAME_SECONDS)
+    pieces = []
+    run_start = first
+    gaps = np.flatnonzero(np.diff(voiced) > max_pause)
+    for g in gaps:
+        pause_start = voiced[g] + 1
+        pause_end = voiced[g + 1]
+        half = keep_pause // 2
+        pieces.append((run_start, pause_start + half))
+        run_start = pause_end - (keep_pause - half)
+    pieces.append((run_start, last))
+
+    def to_sample(f):
+        # the tail past the last full frame goes with the final run
+        return len(audio) if f >= len(silent) else int(f) * frame
+
+    return [(int(a) * frame, to_sample(b)) for a, b in pieces]
+
+
+def trim_silence(audio, sr=SAMPLE_RATE, ranges=None):
+    """
+    Drop leading/trailing silence and shorten long pauses. Returns
+    (audio, removed_seconds); all-silent audio comes back empty.
+    """
+    ranges = kept_ranges(audio, sr) if ranges is None else ranges
+    if not ranges:
+        return audio[:0], len(audio) / sr
+    trimmed = np.concatenate([audio[a:b] for a, b in ranges])
+    return trimmed, (len(audio) - len(trimmed)) / sr
+
+
+def original_seconds(seconds, ranges, sr=SAMPLE_RATE):
+    """Map a time in the trimmed audio back to the recording it was cut from."""
+    sample = seconds * sr
+    offset = 0
+    for a, b in ranges:
+        if sample < offset + (b - a):
+            return (a + sample - offset) / sr
+        offset += b - a
+    return ranges[-1][1] / sr if ranges else seconds
+
+# -----------------------------------------
+# DURATION PROBE (no decode)
+# -----------------------------------------
+def probe_seconds(path):
+    """
+    Duration from container metadata: ffprobe, else the WAV header, else
+    an estimate from the file size. Cheap enough to run at enqueue time.
+    """
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", path],
+            capture_output=True, text=True, timeout=PROBE_TIMEOUT_SECONDS,
+        ).stdout.strip()
+        return float(out)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        pass
+
+    try:
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (OSError, EOFError, wave.Error, ZeroDivisionError):
+        pass
+
+    try:
+        return os.path.getsize(path) / ASSUMED_BYTES_PER_SECOND
+    except OSError:
+        return None
+
+# -----------------------------------------
+# ENTRY POINT
+# -----------------------------------------
+def load_audio(path):
+    """Any format ffmpeg reads -> 16 kHz mono float32 (Whisper's decoder)."""
+    import whisper
+    return whisper.load_audio(path)
+
+
+def prepare(path):
+    """
+    Decode once to 16 kHz mono float32 and trim silence. Returns
+    {"audio", "seconds", "trimmed_seconds", "kept"}; audio is None when
+    the file can't be decoded, and "kept" holds the sample ranges of the
+    recording the audio was cut from (see original_seconds).
+    """
+    try:
+        audio = load_audio(path)
+    except Exception as e:
+        print("❌ Audio decode failed:", e)
+        return {"audio": None, "seconds": 0.0, "trimmed_seconds": 0.0, "kept": []}
+
+    seconds = len(audio) / SAMPLE_RATE
+    removed = 0.0
+    kept = [(0, len(audio))]
+    if TRIM_SILENCE:
+        kept = kept_ranges(audio)
+        audio, removed = trim_silence(audio, ranges=kept)
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+
+    return {
+        "audio": audio,
+        "seconds": round(seconds, 2),
+        "trimmed_seconds": round(removed, 2),
+        "kept": kept,
+    }
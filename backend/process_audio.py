@@ -2,9 +2,22 @@
 import os
 import json
 import re
-import openpyxl
 from datetime import datetime
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import batching
+import long_audio
+import model_registry
+import metrics
+import ollama_client
+import preprocess
+from pipeline import Stage, run_stages
+import vocabulary
+from keyword_matcher import group_hits, distinct_keywords
+import result_cache
+import routing
+import results_store
+from jobs import stage
 
 # -----------------------------------------
 # CONFIG
@@ -16,6 +29,10 @@ EXCEL_FILE = os.path.join(RESULTS_DIR, "analytics_results.xlsx")
 CONVERTED_EXCEL_FILE = os.path.join(RESULTS_DIR, "converted_calls.xlsx")
 SALES_CRM_FILE = os.path.join(RESULTS_DIR, "sales_crm.xlsx")
 
+# The /download endpoints export from MongoDB; the XLSX mirrors are only
+# kept for standalone use (EXCEL_MIRROR=1).
+EXCEL_MIRROR = os.environ.get("EXCEL_MIRROR", "0") == "1"
+
 # -----------------------------------------
 # WEEKLY FILE HELPERS
 # -----------------------------------------
@@ -43,63 +60,88 @@ def safe_write(path, text):
 
 def write_excel(path, row):
     os.makedirs(RESULTS_DIR, exist_ok=True)
-    new_file = not os.path.exists(path)
-
-    wb = openpyxl.Workbook() if new_file else openpyxl.load_workbook(path)
-    ws = wb.active
-
-    if new_file:
-        ws.append(list(row.keys()))
+    results_store.append_row(path, row)
 
-    ws.append(list(row.values()))
-    wb.save(path)
+def flush_excel(path):
+    """Bring the workbook up to date before it is read (e.g. downloaded)."""
+    results_store.flush(path)
+    return path
 
 # -----------------------------------------
 # TRANSCRIPTION
 # -----------------------------------------
 def transcribe_file(filepath):
+    return transcribe_audio(preprocess.prepare(filepath)["audio"])["text"]
+
+def transcribe_audio(audio, model_name=None):
+    """
+    Transcribe a decoded 16 kHz mono buffer (see preprocess.prepare).
+    Returns {"text", "segments"}, segment times relative to the buffer.
+    """
+    if audio is None or not len(audio):
+        return {"text": "", "segments": []}
     try:
-        import whisper
-        model = whisper.load_model("small")
-        result = model.transcribe(filepath)
-        return result.get("text", "") or ""
+        # Short clips share one decode pass with whatever else is waiting;
+        # the batched decode has no timestamps, so the clip is one segment
+        if batching.enabled() and batching.fits(audio):
+            text = batching.get_batcher(model_name).transcribe(audio)
+            seconds = round(len(audio) / preprocess.SAMPLE_RATE, 2)
+            return {"text": text, "segments": [{"start": 0.0, "end": seconds, "text": text}] if text else []}
+
+        # Long calls are split at pauses and transcribed across processes
+        if long_audio.enabled() and long_audio.is_long(audio):
+            with stage("transcribe"):
+                result = long_audio.transcribe(audio, model_name)
+        else:
+            with stage("transcribe"), model_registry.acquire(model_name) as model:
+                result = model.transcribe(audio)
+
+        segments = [
+            {"start": round(s["start"], 2), "end": round(s["end"], 2), "text": s["text"]}
+            for s in result.get("segments") or []
+        ]
+        return {"text": result.get("text", "") or "", "segments": segments}
     except Exception as e:
         print("❌ Transcription failed:", e)
-        return ""
+        return {"text": "", "segments": []}
+
+
+def recording_segments(segments, kept):
+    """Segment times mapped from the trimmed buffer back onto the recording."""
+    if not kept:
+        return segments
+    return [
+        {
+            **s,
+            "start": round(preprocess.original_seconds(s["start"], kept), 2),
+            "end": round(preprocess.original_seconds(s["end"], kept), 2),
+        }
+        for s in segments
+    ]
 
 # -----------------------------------------
 # HINDI NORMALIZATION
 # -----------------------------------------
-HINDI_MAP = {
-    "paisa": "money",
-    "refund chahiye": "refund",
-    "daam": "price",
-    "khareedna": "buy",
-    "booking": "booking",
-    "delivery": "delivery",
-}
-
-def normalize_language(text):
-    t = text.lower()
-    for hi, en in HINDI_MAP.items():
-        t = t.replace(hi, en)
-    return t
+# Vocabularies live in vocab/vocabulary.json (see vocabulary.py); every
+# helper below takes an optional compiled snapshot so one call can use a
+# single version throughout.
+def normalize_language(text, vocab=None):
+    vocab = vocab or vocabulary.current()
+    return vocab.normalizer.replace(text.lower(), vocab.hindi_map)
 
 # -----------------------------------------
 # INTENT DETECTION
 # -----------------------------------------
-INTENTS = {
-    "real_estate_sales": ["property", "flat", "villa", "floor plan"],
-    "software_sales": ["software", "subscription", "demo"],
-    "insurance_sales": ["insurance", "policy", "premium"],
-    "automobile_sales": ["car", "vehicle", "test drive"],
-    "generic_sales": ["buy", "purchase", "order"],
-}
-
-def detect_intents(text):
+def detect_intents(text, vocab=None):
+    vocab = vocab or vocabulary.current()
+    return intents_from_hits(group_hits(vocab.matcher.find_all(text)), vocab)
+
+def intents_from_hits(grouped, vocab=None):
+    # score = number of distinct keywords of the intent present
+    vocab = vocab or vocabulary.current()
     scores = {}
-    for intent, keywords in INTENTS.items():
-        score = sum(1 for k in keywords if k in text)
+    for intent in vocab.intents:
+        score = len(distinct_keywords(grouped.get("intent:" + intent, ())))
         if score > 0:
             scores[intent] = score
     return [max(scores, key=scores.get)] if scores else ["general_call"]
@@ -107,16 +149,25 @@ def detect_intents(text):
 # -----------------------------------------
 # SENTIMENT
 # -----------------------------------------
-def analyze_sentiment(text):
-    t = text.lower()
-    pos = len(re.findall(r"(good|great|happy|resolved|thank)", t))
-    neg = len(re.findall(r"(bad|angry|problem|issue|refund)", t))
+def analyze_sentiment(text, vocab=None):
+    vocab = vocab or vocabulary.current()
+    return sentiment_from_hits(group_hits(vocab.matcher.find_all(text.lower())))
+
+def sentiment_from_hits(grouped):
+    pos = len(grouped.get("sentiment:positive", ()))
+    neg = len(grouped.get("sentiment:negative", ()))
     if pos > neg:
         return "positive"
     if neg > pos:
         return "negative"
     return "neutral"
 
+# -----------------------------------------
+# CONVERSION
+# -----------------------------------------
+def converted_from_hits(grouped):
+    return bool(grouped.get("conversion"))
+
 # -----------------------------------------
 # LOCAL SUMMARY (SAFE FALLBACK)
 # -----------------------------------------
@@ -126,10 +177,12 @@ def analyze_sentiment(text):
     # sentences = re.split(r'(?<=[.!?])\s+', text)
     # sentences = [s for s in sentences if len(s.strip()) > 20]
     # return " ".join(sentences[:max_sentences])
-def local_summary(text):
+def local_summary(text, vocab=None):
     if not text:
         return ""
 
+    vocab = vocab or vocabulary.current()
+
     sentences = re.split(r'(?<=[.!?])\s+', text)
     sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
 
@@ -142,13 +195,10 @@ def local_summary(text):
     }
 
     for s in sentences:
-        sl = s.lower()
-        if any(k in sl for k in ["problem", "issue", "concern", "refund"]):
-            summary["concerns"].append(s)
-        if any(k in sl for k in ["send", "email", "schedule", "call", "follow up"]):
-            summary["actions"].append(s)
-        if any(k in sl for k in ["agreed", "scheduled", "confirmed"]):
-            summary["outcome"].append(s)
+        groups = {hit[3] for hit in vocab.matcher.find_all(s.lower())}
+        for section in ("concerns", "actions", "outcome"):
+            if "summary:" + section in groups:
+                summary[section].append(s)
 
     return f"""
 Call Purpose:
@@ -234,6 +284,14 @@ Follow-up Required:
 
 #     return "\n".join(summary)
 
+# -----------------------------------------
+# SINGLE-PASS TAGGING
+# -----------------------------------------
+def tag_transcript(text, vocab=None):
+    """Every vocabulary hit as (start, end, keyword, group), in one pass."""
+    vocab = vocab or vocabulary.current()
+    return vocab.matcher.find_all(text.lower())
+
 # -----------------------------------------
 # OLLAMA SUMMARY (FIXED)
 # -----------------------------------------
@@ -273,16 +331,7 @@ Follow-up Required:
 #     except Exception as e:
 #         print("❌ Ollama summary failed:", e)
 #         return ""
-def ollama_summary(text):
-    """
-    High-quality executive summary using Ollama
-    Falls back cleanly if Ollama fails
-    """
-
-    if not text.strip():
-        return ""
-
-    prompt = f"""
+SUMMARY_INSTRUCTIONS = """
 You are an enterprise call analysis AI.
 
 STRICT RULES:
@@ -313,63 +362,312 @@ Final Outcome:
 
 Follow-up Required:
 - <Yes/No + brief detail>
+"""
 
-Transcript:
-{text}
+CHUNK_INSTRUCTIONS = """
+You are an enterprise call analysis AI.
+Below is PART {part} of {total} of a customer call transcript.
+List, as short bullet points, only the facts stated in this part:
+what the call is about, points discussed, customer concerns,
+agent actions, outcomes and any follow-up agreed.
+Do NOT invent information. No filler text.
 """
 
+# Long transcripts are summarized chunk by chunk (map) and the chunk
+# notes merged into the final format (reduce).
+SUMMARY_CHUNK_TOKENS = int(os.environ.get("SUMMARY_CHUNK_TOKENS", "1500"))
+SUMMARY_PARALLELISM = max(1, int(os.environ.get("SUMMARY_PARALLELISM", "3")))
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English-like text
+    return len(text) // 4 + 1
+
+
+def split_transcript(text, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """Split on sentence boundaries into chunks of at most ~max_tokens."""
+    max_chars = max_tokens * 4
+    pieces = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        # a single run-on sentence longer than a chunk is cut on words
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks, current, size = [], [], 0
+    for piece in pieces:
+        if current and size + len(piece) + 1 > max_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _generate(prompt):
+    """Ollama completion, or "" on any failure."""
     try:
-        result = subprocess.run(
-            ["ollama", "run", "llama3.1:1b"],   # You can swap to mistral/qwen
-            input=prompt.encode("utf-8"),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=45  # ⏱ much safer timeout
-        )
-
-        output = result.stdout.decode("utf-8").strip()
-
-        # Basic validation
-        if "Call Purpose:" not in output:
-            return ""
+        return ollama_client.get_client().generate(prompt).strip()
 
-        return output
-
-    except subprocess.TimeoutExpired:
+    except ollama_client.OllamaTimeout:
+        metrics.FALLBACKS.inc(reason="ollama_timeout")
         print("⚠️ Ollama timeout — using local summary")
         return ""
 
+    except ollama_client.OllamaUnavailable as e:
+        # circuit open: fail fast and quietly, local_summary takes over
+        if str(e) == "circuit open":
+            metrics.FALLBACKS.inc(reason="ollama_circuit_open")
+        else:
+            metrics.FALLBACKS.inc(reason="ollama_error")
+            print("❌ Ollama error:", e)
+        return ""
+
     except Exception as e:
+        metrics.FALLBACKS.inc(reason="ollama_error")
         print("❌ Ollama error:", e)
         return ""
 
+
+def ollama_summary(text):
+    """
+    High-quality executive summary using Ollama
+    Falls back cleanly if Ollama fails
+    """
+
+    if not text.strip():
+        return ""
+
+    if estimate_tokens(text) > SUMMARY_CHUNK_TOKENS:
+        return chunked_summary(text)
+
+    output = _generate(f"{SUMMARY_INSTRUCTIONS}\nTranscript:\n{text}\n")
+
+    # Basic validation
+    if "Call Purpose:" not in output:
+        return ""
+
+    return output
+
+
+def chunked_summary(text, max_tokens=SUMMARY_CHUNK_TOKENS, parallelism=SUMMARY_PARALLELISM):
+    """
+    Map-reduce summary for transcripts that don't fit one prompt:
+    chunks are summarized concurrently (at most `parallelism` at a time),
+    then the notes are merged into the standard format. Any failed chunk
+    returns "" so the caller falls back to local_summary on the full text.
+    """
+    chunks = split_transcript(text, max_tokens)
+    total = len(chunks)
+
+    prompts = [
+        f"{CHUNK_INSTRUCTIONS.format(part=i + 1, total=total)}\nTranscript part:\n{chunk}\n"
+        for i, chunk in enumerate(chunks)
+    ]
+    with ThreadPoolExecutor(max_workers=min(parallelism, total)) as pool:
+        notes = list(pool.map(_generate, prompts))
+
+    if not all(notes):
+        return ""
+
+    merged = "\n\n".join(f"Part {i + 1} notes:\n{n}" for i, n in enumerate(notes))
+    output = _generate(
+        f"{SUMMARY_INSTRUCTIONS}\n"
+        "The transcript was too long to read at once. Below are notes taken\n"
+        "from each part of it, in order. Summarize the whole call from them.\n\n"
+        f"{merged}\n"
+    )
+
+    if "Call Purpose:" not in output:
+        return ""
+
+    return output
+
 # -----------------------------------------
 # MAIN
 # -----------------------------------------
-def process_uploaded_audio(audio_path):
-    filename = os.path.basename(audio_path)
-    base = os.path.splitext(filename)[0]
+def _summarize(transcript, vocab):
+    with stage("summary"):
+        summary = ollama_summary(transcript)
+    if not summary and transcript.strip():
+        metrics.FALLBACKS.inc(reason="local_summary")
+    return summary or local_summary(transcript, vocab)
+
+
+def _route(prepared, quality):
+    audio = prepared["audio"]
+    seconds = len(audio) / preprocess.SAMPLE_RATE if audio is not None else 0
+    return routing.choose_tier(seconds, quality)
+
+def _analysis(r, vocab, **extra):
+    """Everything the result cache stores, from the text stages' outputs."""
+    intents = r["intents"]
+    return {
+        "transcript": r["transcript"],
+        "summary": r["summary"],
+        "sentiment": r["sentiment"],
+        "intents": intents,
+        "converted": r["conversion"],
+        "sales_call": any(i.endswith("_sales") for i in intents),
+        "vocab_version": vocab.version,
+        **extra,
+    }
+
+def text_stages(vocab):
+    """Analytics on r["transcript"]: the summary runs alongside the keyword stages."""
+    return [
+        Stage("summary", lambda r: _summarize(r["transcript"], vocab), ["transcript"]),
+        Stage("normalize", lambda r: normalize_language(r["transcript"], vocab), ["transcript"]),
+        Stage("tag", lambda r: group_hits(tag_transcript(r["normalize"], vocab)), ["normalize"]),
+        Stage("intents", lambda r: intents_from_hits(r["tag"], vocab), ["tag"]),
+        Stage("sentiment", lambda r: sentiment_from_hits(r["tag"]), ["tag"]),
+        Stage("conversion", lambda r: converted_from_hits(r["tag"]), ["tag"]),
+    ]
+
+TEXT_OUTPUTS = ["transcript", "summary", "intents", "sentiment", "conversion"]
 
-    transcript = transcribe_file(audio_path)
-    safe_write(os.path.join(TRANSCRIPT_DIR, base + ".txt"), transcript)
+def analysis_stages(audio_path, vocab, quality=None):
+    """
+    Transcription + text analytics as a stage DAG. Once the transcript
+    exists the summary runs alongside the keyword stages; "analysis"
+    assembles everything the result cache stores.
+    """
+    def assemble(r):
+        return _analysis(
+            r, vocab,
+            segments=recording_segments(r["transcribe"]["segments"], r["preprocess"]["kept"]),
+            audio_seconds=r["preprocess"]["seconds"],
+            trimmed_seconds=r["preprocess"]["trimmed_seconds"],
+            model_tier=r["route"][0],
+        )
 
-    normalized = normalize_language(transcript)
-    intents = detect_intents(normalized)
+    return [
+        # decode once; trimmed silence never reaches the model
+        Stage("preprocess", lambda r: preprocess.prepare(audio_path)),
+        # tier from trimmed duration, queue depth and the quality hint
+        Stage("route", lambda r: _route(r["preprocess"], quality), ["preprocess"]),
+        Stage("transcribe", lambda r: transcribe_audio(r["preprocess"]["audio"], r["route"][0]), ["preprocess", "route"]),
+        Stage("transcript", lambda r: r["transcribe"]["text"], ["transcribe"]),
+        *text_stages(vocab),
+        Stage("analysis", assemble, ["preprocess", "route", "transcribe", *TEXT_OUTPUTS]),
+    ]
 
-    summary = ollama_summary(transcript) or local_summary(transcript)
-    sentiment = analyze_sentiment(transcript)
 
-    conversion_words = ["purchase", "order", "buy", "confirmed"]
-    is_converted = any(w in normalized for w in conversion_words)
-    is_sales_call = any(i.endswith("_sales") for i in intents)
+def analyze_audio(audio_path, vocab=None, quality=None):
+    """Transcription + text analytics; everything the result cache stores."""
+    vocab = vocab or vocabulary.current()
+    outputs, _ = run_stages(analysis_stages(audio_path, vocab, quality))
+    return outputs["analysis"]
+
+
+def persist_stages(filename, base):
+    """
+    Persistence starts as soon as its inputs exist: the transcript file
+    is written while the summary is still running.
+    """
+    stages = [Stage(
+        "write_transcript",
+        lambda r: safe_write(os.path.join(TRANSCRIPT_DIR, base + ".txt"), r["transcript"]),
+        ["transcript"],
+    )]
+    if EXCEL_MIRROR:
+        stages.append(Stage(
+            "write_excel",
+            lambda r: write_result_rows(filename, base, r["analysis"]),
+            ["analysis"],
+        ))
+    return stages
+
+
+def process_uploaded_audio(audio_path, audio_sha256=None, quality=None):
+    filename = os.path.basename(audio_path)
+    base = os.path.splitext(filename)[0]
+
+    # Same audio + same model/pipeline/vocabulary version/quality -> reuse the earlier analysis
+    vocab = vocabulary.current()
+    key = result_cache.cache_key(
+        audio_sha256 or result_cache.file_sha256(audio_path),
+        vocab.version,
+        quality if quality != "balanced" else None,
+    )
+    cached_analysis = result_cache.get(key)
+    cached = cached_analysis is not None
+
+    if cached:
+        stages = [
+            Stage("transcript", lambda r: cached_analysis["transcript"]),
+            Stage("analysis", lambda r: cached_analysis),
+        ]
+    else:
+        stages = analysis_stages(audio_path, vocab, quality)
+
+    outputs, timings = run_stages(stages + persist_stages(filename, base))
+    analysis = outputs["analysis"]
+
+    for name, ms in timings.items():
+        # "transcript" only unpacks, and on a cache hit "analysis" replays stored values
+        if name == "transcript" or (cached and name == "analysis"):
+            continue
+        metrics.STAGE_SECONDS.observe(ms / 1000, stage=name)
+    if not cached:
+        metrics.TRIMMED_SECONDS.inc(analysis.get("trimmed_seconds", 0))
+    if not cached and not analysis["transcript"]:
+        metrics.FALLBACKS.inc(reason="empty_transcript")
+
+    # A backlog downgrade is temporary; don't pin its transcript
+    downgraded = not cached and outputs["route"][1]
+    if downgraded:
+        metrics.FALLBACKS.inc(reason="model_downgraded")
+
+    # An empty transcript usually means Whisper failed; retry next time
+    if not cached and not downgraded and analysis["transcript"]:
+        result_cache.put(key, analysis)
+
+    return {"call_id": base, **analysis, "cached": cached, "timings": timings}
+
+
+def process_transcript(base, transcript, audio_seconds=None, model_tier=None):
+    """
+    Same analytics and persistence as process_uploaded_audio, for a call
+    that was already transcribed (live streaming).
+    """
+    vocab = vocabulary.current()
+    stages = [
+        Stage("transcript", lambda r: transcript),
+        *text_stages(vocab),
+        Stage("analysis", lambda r: _analysis(
+            r, vocab, audio_seconds=audio_seconds, trimmed_seconds=0.0, model_tier=model_tier,
+        ), TEXT_OUTPUTS),
+    ]
+    outputs, timings = run_stages(stages + persist_stages(base, base))
+    analysis = outputs["analysis"]
+
+    for name, ms in timings.items():
+        if name not in ("transcript", "analysis"):
+            metrics.STAGE_SECONDS.observe(ms / 1000, stage=name)
+    if not transcript:
+        metrics.FALLBACKS.inc(reason="empty_transcript")
+
+    return {"call_id": base, **analysis, "cached": False, "timings": timings}
+
+
+def write_result_rows(filename, base, analysis):
+    is_converted = analysis["converted"]
+    is_sales_call = analysis["sales_call"]
 
     row = {
         "file": filename,
         "call_id": base,
         "processed_at": _now_ts(),
-        "summary": summary,
-        "sentiment": sentiment,
-        "intents": json.dumps(intents),
+        "summary": analysis["summary"],
+        "sentiment": analysis["sentiment"],
+        "intents": json.dumps(analysis["intents"]),
         "converted": is_converted,
     }
 
@@ -383,15 +681,5 @@ def process_uploaded_audio(audio_path):
     if is_sales_call:
         write_excel(get_weekly_sales_file(), row)
 
-    return {
-        "call_id": base,
-        "transcript": transcript,
-        "summary": summary,
-        "sentiment": sentiment,
-        "intents": intents,
-        "converted": is_converted,
-        "sales_call": is_sales_call,
-    }
-
 if __name__ == "__main__":
     print("process_audio.py ready ✔")
@@ -0,0 +1,60 @@
+# response_cache.py
+import os
+import time
+import asyncio
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", "10"))
+
+# -----------------------------------------
+# ASYNC TTL CACHE
+# -----------------------------------------
+class AsyncTTLCache:
+    """
+    Caches coroutine results per key for `ttl` seconds.
+
+    Concurrent misses for the same key share one computation
+    (single-flight). invalidate() drops entries immediately; a computation
+    already running at that point still answers its own waiters but is
+    not stored or shared with later callers.
+    """
+
+    def __init__(self, ttl=STATS_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}    # key -> (expires_at, value)
+        self._inflight = {}   # key -> asyncio.Task
+        self._generation = 0
+
+    async def get_or_compute(self, key, compute):
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fill(key, compute, self._generation))
+            self._inflight[key] = task
+        # shield: one cancelled request must not cancel everyone's query
+        return await asyncio.shield(task)
+
+    async def _fill(self, key, compute, generation):
+        try:
+            value = await compute()
+            if self.ttl > 0 and generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def invalidate(self, key=None):
+        # running computations may predate the change: later callers start a new one
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
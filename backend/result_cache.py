@@ -0,0 +1,100 @@
+# result_cache.py
+import os
+import json
+import hashlib
+import threading
+
+import model_registry
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", "cache")
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "500"))
+
+# Bump whenever the pipeline's output for the same audio would change
+PIPELINE_VERSION = "2"   # 2: silence trimming before transcription
+
+_lock = threading.Lock()
+
+# -----------------------------------------
+# KEYS
+# -----------------------------------------
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(audio_sha256, vocab_version="", quality=""):
+    raw = f"{audio_sha256}:{model_registry.WHISPER_MODEL}:{PIPELINE_VERSION}:{vocab_version}"
+    if quality:
+        raw += f":{quality}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(RESULT_CACHE_DIR, key + ".json")
+
+# -----------------------------------------
+# GET / PUT
+# -----------------------------------------
+def get(key):
+    if RESULT_CACHE_MAX_ENTRIES <= 0:
+        return None
+
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        os.utime(path)   # mtime doubles as LRU recency
+        return result
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print("⚠️ Dropping unreadable cache entry:", path, e)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+
+def put(key, result):
+    if RESULT_CACHE_MAX_ENTRIES <= 0:
+        return
+
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    path = _entry_path(key)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    os.replace(tmp, path)   # readers never see a half-written entry
+
+    _evict()
+
+
+def _evict():
+    with _lock:
+        entries = []
+        for name in os.listdir(RESULT_CACHE_DIR):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(RESULT_CACHE_DIR, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+
+        excess = len(entries) - RESULT_CACHE_MAX_ENTRIES
+        if excess <= 0:
+            return
+
+        entries.sort()
+        for _, path in entries[:excess]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,181 @@
+# results_store.py
+import os
+import glob
+import json
+import time
+import uuid
+import queue
+import threading
+
+import openpyxl
+
+try:
+    import fcntl   # cross-process locking (POSIX only)
+except ImportError:
+    fcntl = None
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+# Rows are appended to "<workbook>.rows.jsonl" and folded into the XLSX
+# by a background thread every EXCEL_FLUSH_ROWS rows, or synchronously
+# when the workbook is downloaded.
+EXCEL_FLUSH_ROWS = int(os.environ.get("EXCEL_FLUSH_ROWS", "200"))
+
+_locks = {}        # append lock per workbook: held for O(pending rows) at most
+_save_locks = {}   # save lock per workbook: held while the XLSX is rewritten
+_locks_guard = threading.Lock()
+_pending = {}
+
+_flush_queue = queue.Queue()
+_scheduled = set()
+_worker = None
+
+# -----------------------------------------
+# HELPERS
+# -----------------------------------------
+def log_path(path):
+    return path + ".rows.jsonl"
+
+
+def batch_glob(path):
+    return glob.escape(path) + ".batch-*.jsonl"
+
+
+def _lock_for(path, locks=_locks):
+    with _locks_guard:
+        return locks.setdefault(path, threading.Lock())
+
+
+class _FileLock:
+    """Exclusive lock on an open file, shared with other worker processes."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        if fcntl:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+        return self.f
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+
+def _count_lines(path):
+    try:
+        with open(path, "rb") as f:
+            return sum(1 for _ in f)
+    except FileNotFoundError:
+        return 0
+
+# -----------------------------------------
+# APPEND / FLUSH
+# -----------------------------------------
+def append_row(path, row):
+    """Constant-cost append; the workbook itself is only touched on flush."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(row, ensure_ascii=False, default=str) + "\n"
+    log = log_path(path)
+
+    with _lock_for(path):
+        if path not in _pending:
+            _pending[path] = _count_lines(log)
+
+        with open(log, "a", encoding="utf-8") as f, _FileLock(f):
+            f.write(line)
+            f.flush()
+
+        _pending[path] += 1
+        due = _pending[path] >= EXCEL_FLUSH_ROWS
+
+    if due:
+        _schedule_flush(path)
+
+
+def flush(path):
+    """Fold pending rows into the XLSX. Returns the number of rows written."""
+    _take_rows(path)
+
+    # batch files left by any process (or a crash) go in, oldest first
+    with _lock_for(path, _save_locks), open(path + ".lock", "a") as lock, _FileLock(lock):
+        batches = sorted(glob.glob(batch_glob(path)))
+        rows = []
+        for batch in batches:
+            with open(batch, encoding="utf-8") as f:
+                rows.extend(json.loads(line) for line in f if line.strip())
+        if rows:
+            _save_rows(path, rows)
+        for batch in batches:
+            os.remove(batch)
+
+    return len(rows)
+
+
+def _take_rows(path):
+    """
+    Move the logged rows into a batch file of their own, so appends never
+    wait for a workbook save. Returns the batch path, or None.
+    """
+    log = log_path(path)
+    if not os.path.exists(log):
+        return None
+
+    batch = None
+    with _lock_for(path):
+        with open(log, "r+", encoding="utf-8") as f, _FileLock(f):
+            data = f.read()
+            if data.strip():
+                batch = f"{path}.batch-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.jsonl"
+                with open(batch, "w", encoding="utf-8") as out:
+                    out.write(data)
+            f.seek(0)
+            f.truncate()
+        _pending[path] = 0
+
+    return batch
+
+# -----------------------------------------
+# BACKGROUND FLUSH
+# -----------------------------------------
+def _schedule_flush(path):
+    """Queue one background flush per workbook; repeats while it waits are dropped."""
+    global _worker
+    with _locks_guard:
+        if path in _scheduled:
+            return
+        _scheduled.add(path)
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_flush_worker, name="excel-flush", daemon=True)
+            _worker.start()
+    _flush_queue.put(path)
+
+
+def _flush_worker():
+    while True:
+        path = _flush_queue.get()
+        with _locks_guard:
+            _scheduled.discard(path)   # rows arriving from now on schedule the next flush
+        try:
+            flush(path)
+        except Exception as e:
+            # rows stay in the log / batch files and go in with the next flush
+            print("❌ Excel flush failed:", e)
+
+
+def _save_rows(path, rows):
+    new_file = not os.path.exists(path)
+
+    wb = openpyxl.Workbook() if new_file else openpyxl.load_workbook(path)
+    ws = wb.active
+
+    if new_file:
+        ws.append(list(rows[0].keys()))
+
+    for row in rows:
+        ws.append(list(row.values()))
+
+    tmp = path + ".tmp.xlsx"
+    wb.save(tmp)
+    os.replace(tmp, path)
@@ -0,0 +1,153 @@
+# rollups.py
+from datetime import datetime, timedelta
+from urllib.parse import unquote
+
+from pymongo import UpdateOne
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+# Calls expire after 30 days (expiresAt TTL), so "all time" stats only
+# cover the last 30 daily buckets.
+RETENTION_DAYS = 30
+TOP_TOPICS = 10
+
+# One document per UTC day and per ISO week:
+#   {_id: "day:2025-12-01" | "week:2025-W49", period, start, total, positive, tags: {tag: n}}
+# plus the backfill marker {_id: "backfill", started, finished, calls}.
+COLLECTION = "call_rollups"
+BACKFILL_ID = "backfill"
+
+# -----------------------------------------
+# KEYS
+# -----------------------------------------
+def day_start(dt):
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def week_start(dt):
+    return day_start(dt - timedelta(days=dt.weekday()))
+
+
+def day_key(dt):
+    return f"day:{dt.date().isoformat()}"
+
+
+def week_key(dt):
+    year, week, _ = dt.isocalendar()
+    return f"week:{year}-W{week:02d}"
+
+
+def _tag_field(tag):
+    # field names can't contain "." or start with "$": percent-escape
+    # them (and "%" itself) so _tag_name() gives back the exact tag
+    name = str(tag).replace("%", "%25").replace(".", "%2E")
+    if name.startswith("$"):
+        name = "%24" + name[1:]
+    return "tags." + name
+
+
+def _tag_name(field):
+    return unquote(field)
+
+# -----------------------------------------
+# INCREMENTAL UPDATE
+# -----------------------------------------
+def _increments(docs):
+    """Fold call documents into {rollup_id: ({$inc}, {$setOnInsert})}."""
+    updates = {}
+    for doc in docs:
+        created = doc["created_at"]
+        buckets = [
+            (day_key(created), "day", day_start(created)),
+            (week_key(created), "week", week_start(created)),
+        ]
+        for key, period, start in buckets:
+            inc, _ = updates.setdefault(key, ({}, {"period": period, "start": start}))
+            inc["total"] = inc.get("total", 0) + 1
+            inc["positive"] = inc.get("positive", 0) + (doc.get("sentiment") == "positive")
+            for tag in set(doc.get("tags") or []):
+                field = _tag_field(tag)
+                inc[field] = inc.get(field, 0) + 1
+    return updates
+
+
+async def record_calls(db, docs):
+    """Add freshly inserted calls to their day and week rollups (one round trip)."""
+    updates = _increments(docs)
+    if not updates:
+        return
+    ops = [
+        UpdateOne({"_id": key}, {"$inc": inc, "$setOnInsert": on_insert}, upsert=True)
+        for key, (inc, on_insert) in updates.items()
+    ]
+    await db[COLLECTION].bulk_write(ops, ordered=False)
+
+
+async def record_call(db, doc):
+    await record_calls(db, [doc])
+
+
+async def rebuild_if_empty(db):
+    """
+    First start with existing calls: backfill rollups from db.calls once.
+    Every worker process runs this at startup; only the one that inserts
+    the backfill marker folds the calls in, and only calls created before
+    it started (later ones are counted by record_calls as they arrive).
+    """
+    started = datetime.utcnow()
+    if await db[COLLECTION].find_one({}, {"_id": 1}):
+        return 0
+
+    claimed = await db[COLLECTION].update_one(
+        {"_id": BACKFILL_ID}, {"$setOnInsert": {"started": started}}, upsert=True
+    )
+    if claimed.upserted_id is None:
+        return 0
+
+    cursor = db.calls.find(
+        {"created_at": {"$lt": started}}, {"created_at": 1, "sentiment": 1, "tags": 1}
+    )
+    batch, count = [], 0
+    async for doc in cursor:
+        if isinstance(doc.get("created_at"), datetime):
+            batch.append(doc)
+        if len(batch) >= 1000:
+            await record_calls(db, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        await record_calls(db, batch)
+        count += len(batch)
+
+    await db[COLLECTION].update_one(
+        {"_id": BACKFILL_ID}, {"$set": {"finished": datetime.utcnow(), "calls": count}}
+    )
+    return count
+
+# -----------------------------------------
+# READS
+# -----------------------------------------
+async def summary(db, now=None):
+    now = now or datetime.utcnow()
+    since = day_start(now) - timedelta(days=RETENTION_DAYS - 1)
+    total = positive = 0
+    async for r in db[COLLECTION].find(
+        {"period": "day", "start": {"$gte": since}}, {"total": 1, "positive": 1}
+    ):
+        total += r.get("total", 0)
+        positive += r.get("positive", 0)
+    return total, positive
+
+
+async def week(db, now=None):
+    """(total, positive, topics) for the ISO week containing `now`."""
+    now = now or datetime.utcnow()
+    r = await db[COLLECTION].find_one({"_id": week_key(now)}) or {}
+    total = r.get("total", 0)
+    tags = r.get("tags", {})
+    topics = sorted(
+        ({"_id": _tag_name(field), "count": min(count, total)} for field, count in tags.items() if count > 0),
+        key=lambda t: -t["count"],
+    )[:TOP_TOPICS]
+    return total, r.get("positive", 0), topics
@@ -0,0 +1,59 @@
+# routing.py
+import os
+
+import model_registry
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+# Whisper tiers from fastest to most accurate. WHISPER_MODEL is the
+# normal tier; "fast" requests start at the first, "best" at the last.
+# Every tier that gets used is loaded (WHISPER_POOL_SIZE copies) on
+# first use, so only list what fits in memory.
+WHISPER_TIERS = [
+    t.strip() for t in os.environ.get("WHISPER_TIERS", "tiny,base,small").split(",") if t.strip()
+]
+if model_registry.WHISPER_MODEL not in WHISPER_TIERS:
+    WHISPER_TIERS.append(model_registry.WHISPER_MODEL)
+
+QUALITY_HINTS = ("fast", "balanced", "best")
+
+# Step down one tier at each threshold
+ROUTE_LONG_AUDIO_SECONDS = float(os.environ.get("ROUTE_LONG_AUDIO_SECONDS", "1200"))
+ROUTE_QUEUE_DEPTHS = [
+    int(d) for d in os.environ.get("ROUTE_QUEUE_DEPTHS", "10,25").split(",") if d.strip()
+]
+
+
+def queue_depth():
+    """Jobs waiting for a worker; server.py replaces this with its JobQueue's depth."""
+    return 0
+
+# -----------------------------------------
+# POLICY
+# -----------------------------------------
+def _start_index(quality):
+    if quality == "fast":
+        return 0
+    if quality == "best":
+        return len(WHISPER_TIERS) - 1
+    return WHISPER_TIERS.index(model_registry.WHISPER_MODEL)
+
+
+def choose_tier(duration_seconds, quality=None, depth=None):
+    """
+    (tier, degraded) for one recording. Long audio ("balanced" only) and
+    queue backlog each step down a tier, never below the fastest;
+    degraded is True when backlog forced the step, so callers know the
+    result is worse than the request would normally get.
+    """
+    index = _start_index(quality)
+    if quality in (None, "balanced") and duration_seconds >= ROUTE_LONG_AUDIO_SECONDS:
+        index -= 1
+    nominal = max(0, index)
+
+    depth = queue_depth() if depth is None else depth
+    index -= sum(1 for threshold in ROUTE_QUEUE_DEPTHS if depth >= threshold)
+    index = max(0, index)
+
+    return WHISPER_TIERS[index], index < nominal
@@ -2,15 +2,36 @@
 import os
 import openpyxl
 
+import json
 import time
-from datetime import datetime, timedelta
+import uuid
+import asyncio
+import zipfile
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.concurrency import run_in_threadpool
-
-from process_audio import process_uploaded_audio
+from pymongo.errors import BulkWriteError
+
+from process_audio import process_uploaded_audio, process_transcript
+from jobs import JobQueue, QueueFull
+from response_cache import AsyncTTLCache
+from uploads import UploadTooLarge
+import uploads
+import bulk
+import exports
+import metrics
+import model_registry
+import long_audio
 import mongodb
+import pagination
+import preprocess
+import rollups
+import streaming
+import routing
+import vocabulary
 
 # -------------------------------------------------------
 # APP
@@ -19,35 +40,80 @@ app = FastAPI(
     description="Audio processing backend using FastAPI + MongoDB",
     version="1.0.1"
 )
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import os
 
-@app.get("/download/overall")
-def download_overall_calls():
-    file_path = "results/analytics_results.xlsx"
-    return FileResponse(
-        file_path,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename="overall_calls.xlsx"
+job_queue = JobQueue()
+batches = bulk.BatchRegistry()
+stats_cache = AsyncTTLCache()   # /stats/*, dropped on every new call
+metrics.QUEUE_DEPTH.fn = lambda: job_queue.depth
+metrics.IN_FLIGHT.fn = lambda: job_queue.in_flight
+routing.queue_depth = lambda: job_queue.depth
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_FORMATS = "^(xlsx|csv|ndjson)$"
+
+async def _export_response(query, fmt, download_name, fields=None):
+    """
+    Stream matching calls as CSV or NDJSON, or as an XLSX built in a
+    write-only workbook. `fields` picks the NDJSON keys (default: the
+    list view, without transcript/segments/analysis_raw).
+    """
+    if fmt == "ndjson":
+        try:
+            projection = exports.field_projection(fields) or {**LIST_PROJECTION, "_id": 0}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return StreamingResponse(
+            exports.iter_ndjson(exports.find_calls(mongodb.get_db(), query, projection)),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="{download_name}.ndjson"'},
+        )
+
+    cursor = exports.find_calls(mongodb.get_db(), query)
+
+    if fmt == "csv":
+        return StreamingResponse(
+            exports.iter_csv(cursor),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{download_name}.csv"'},
+        )
+
+    wb = await exports.fill_xlsx(cursor)
+    path = await run_in_threadpool(exports.save_xlsx, wb)
+    return StreamingResponse(
+        exports.iter_file(path),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{download_name}.xlsx"'},
     )
 
+@app.get("/export/calls")
+async def export_calls(
+    format: str = Query("xlsx", pattern=EXPORT_FORMATS),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    sentiment: Optional[str] = None,
+    tag: Optional[str] = None,
+    sales_only: bool = False,
+    fields: Optional[str] = None,
+):
+    query = exports.build_query(start, end, sentiment, tag, sales_only)
+    return await _export_response(query, format, "calls", fields)
+
+@app.get("/download/overall")
+async def download_overall_calls(format: str = Query("xlsx", pattern=EXPORT_FORMATS), fields: Optional[str] = None):
+    return await _export_response({}, format, "overall_calls", fields)
+
 @app.get("/download/weekly-calls")
-def download_weekly_calls():
-    file_path = get_weekly_excel_file()  # your existing helper
-    return FileResponse(
-        file_path,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename="weekly_calls.xlsx"
-    )
+async def download_weekly_calls(format: str = Query("xlsx", pattern=EXPORT_FORMATS), fields: Optional[str] = None):
+    query = exports.build_query(start=start_of_current_week())
+    return await _export_response(query, format, "weekly_calls", fields)
 
 @app.get("/download/weekly-sales")
-def download_weekly_sales():
-    file_path = "results/sales_crm.xlsx"
-    return FileResponse(
-        file_path,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename="weekly_sales.xlsx"
-    )
+async def download_weekly_sales(format: str = Query("xlsx", pattern=EXPORT_FORMATS), fields: Optional[str] = None):
+    query = exports.build_query(start=start_of_current_week(), sales_only=True)
+    return await _export_response(query, format, "weekly_sales", fields)
 
 # -------------------------------------------------------
 # CORS
@@ -58,6 +124,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+# Single uploads are refused while still arriving, not after Starlette
+# has spooled them (bulk requests are capped per file, see bulk.py)
+app.add_middleware(
+    uploads.BodySizeLimit,
+    limits={"/process-audio": uploads.MAX_UPLOAD_MB * 1024 * 1024},
 )
 
 # -------------------------------------------------------
@@ -65,6 +139,14 @@ app.add_middleware(
 # -------------------------------------------------------
 @app.on_event("startup")
 async def startup_event():
+    await job_queue.start()
+
+    vocabulary.reload()
+
+    removed = uploads.sweep_stale()
+    if removed:
+        print(f"🧹 Removed {removed} stale temp uploads")
+
     db = mongodb.get_db()
     try:
         await db.command("ping")
@@ -72,10 +154,40 @@ async def startup_event():
     except:
         print("MongoDB NOT Connected")
 
+    await mongodb.ensure_indexes()
+
     try:
-        await db.calls.create_index("expiresAt", expireAfterSeconds=0)
-    except:
-        pass
+        backfilled = await rollups.rebuild_if_empty(db)
+        if backfilled:
+            print(f"📊 Rollups rebuilt from {backfilled} calls")
+    except Exception as e:
+        print("❌ Rollup backfill failed:", e)
+
+    # Load Whisper once so the first upload doesn't pay for it
+    try:
+        await run_in_threadpool(model_registry.warm_up)
+    except Exception as e:
+        print("❌ Whisper warm-up failed:", e)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await batches.stop()
+    await job_queue.stop()
+    long_audio.shutdown()
+
+# -------------------------------------------------------
+# METRICS
+# -------------------------------------------------------
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# -------------------------------------------------------
+# MODEL INFO
+# -------------------------------------------------------
+@app.get("/models")
+def get_models():
+    return model_registry.stats()
 
 # -------------------------------------------------------
 # WEEK START (MONDAY 00:00 UTC)
@@ -88,57 +200,396 @@ def start_of_current_week():
 # -------------------------------------------------------
 # PROCESS AUDIO
 # -------------------------------------------------------
+QUALITY_HINTS = "^(" + "|".join(routing.QUALITY_HINTS) + ")$"
+
+def _stamp():
+    """
+    Millisecond timestamp plus a random suffix. Names call_ids (unique
+    index) and temp files, so two requests landing in the same
+    millisecond must not share one.
+    """
+    return f"{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
+
+
+def _call_doc(result, timestamp, audio_sha256=None):
+    now = datetime.utcnow()
+    return {
+        "call_id": f"call_{timestamp}",
+        "customer_id": result.get("customer_id", "NA"),
+        "sentiment": str(result.get("sentiment", "neutral")).lower(),
+        "emotion": result.get("emotion"),
+        "summary": result.get("summary"),
+        "transcript": result.get("transcript"),
+        "segments": result.get("segments", []),
+        "tags": list(set(result.get("intents", []))),   # ⭐ Deduplicate tags
+        "analysis": result.get("analysis", {}),
+        "analysis_raw": result.get("analysis_raw", ""),
+        "converted": bool(result.get("converted")),
+        "sales_call": bool(result.get("sales_call")),
+        "vocab_version": result.get("vocab_version"),
+        "model_tier": result.get("model_tier"),
+        "audio_seconds": result.get("audio_seconds"),
+        "trimmed_seconds": result.get("trimmed_seconds"),
+        "timings": result.get("timings", {}),
+        "audio_sha256": audio_sha256,
+        "created_at": now,
+        "expiresAt": now + timedelta(days=30)
+    }
+
+
+async def _store_calls(docs):
+    """
+    Insert call documents in one round trip and fold them into the
+    rollups. Returns {call_id: error} for documents a bulk insert
+    rejected; a single insert raises instead.
+    """
+    db = mongodb.get_db()
+    errors = {}
+
+    started = time.perf_counter()
+    if len(docs) == 1:
+        await db.calls.insert_one(docs[0])
+    else:
+        try:
+            await db.calls.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                errors[docs[err["index"]]["call_id"]] = err.get("errmsg", "insert failed")
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="mongo_insert")
+
+    stored = [d for d in docs if d["call_id"] not in errors]
+    if stored:
+        try:
+            await rollups.record_calls(db, stored)
+        except Exception as e:
+            print("❌ Rollup update failed:", e)
+        stats_cache.invalidate()
+
+    return errors
+
+
+async def _probe(temp_path):
+    started = time.perf_counter()
+    seconds = await run_in_threadpool(preprocess.probe_seconds, temp_path)
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="probe")
+    return seconds
+
+
+async def _process_and_store(temp_path, timestamp, audio_sha256=None, quality=None):
+    """Run the pipeline on a saved upload and persist it; always removes the temp file."""
+    try:
+        result = await run_in_threadpool(process_uploaded_audio, temp_path, audio_sha256, quality)
+        doc = _call_doc(result, timestamp, audio_sha256)
+        await _store_calls([doc])
+        return {"call_id": doc["call_id"]}
+
+    finally:
+        uploads.remove_quietly(temp_path)
+
+
 @app.post("/process-audio")
-async def process_audio_api(file: UploadFile = File(...)):
+async def process_audio_api(
+    file: UploadFile = File(...),
+    wait: bool = True,
+    quality: str = Query("balanced", pattern=QUALITY_HINTS),
+):
+    """
+    wait=true (default): respond once the call is processed.
+    wait=false: respond 202 with a job_id to poll at /jobs/{job_id}.
+    Either way the work runs on the bounded job queue; 429 when it's full.
+    quality picks the starting Whisper tier (see routing.py).
+    """
     temp_path = None
     try:
-        timestamp = int(time.time() * 1000)
-        temp_path = f"temp_{timestamp}_{file.filename}"
-
-        with open(temp_path, "wb") as f:
-            f.write(await file.read())
+        timestamp = _stamp()
+        temp_path = uploads.temp_path_for(file.filename, timestamp)
 
-        result = await run_in_threadpool(process_uploaded_audio, temp_path)
+        started = time.perf_counter()
+        _, audio_sha256 = await uploads.save_upload(file, temp_path)
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="upload_write")
 
-        now = datetime.utcnow()
-        unique_call_id = f"call_{timestamp}"
+        # shortest job first: cost = probed duration
+        cost = await _probe(temp_path)
+        job_id = job_queue.submit(_process_and_store, temp_path, timestamp, audio_sha256, quality, cost=cost)
+        temp_path = None   # owned by the job from here on
 
-        doc = {
-            "call_id": unique_call_id,
-            "customer_id": result.get("customer_id", "NA"),
-            "sentiment": str(result.get("sentiment", "neutral")).lower(),
-            "emotion": result.get("emotion"),
-            "summary": result.get("summary"),
-            "transcript": result.get("transcript"),
-            "tags": list(set(result.get("intents", []))),   # ⭐ Deduplicate tags
-            "analysis": result.get("analysis", {}),
-            "analysis_raw": result.get("analysis_raw", ""),
-            "created_at": now,
-            "expiresAt": now + timedelta(days=30)
-        }
+        if not wait:
+            return JSONResponse(
+                status_code=202,
+                content={"status": "queued", "job_id": job_id},
+            )
 
-        db = mongodb.get_db()
-        await db.calls.insert_one(doc)
+        result = await job_queue.wait(job_id)
+        return {"status": "ok", "call_id": result["call_id"]}
 
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
-        return {"status": "ok", "call_id": unique_call_id}
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
 
     except Exception as e:
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
+    finally:
+        uploads.remove_quietly(temp_path)
+
+# -------------------------------------------------------
+# BULK INGESTION
+# -------------------------------------------------------
+async def _process_batch_file(entry, temp_path, timestamp, audio_sha256, quality, buffer):
+    """Like _process_and_store, but the insert is batched with the rest of the batch."""
+    entry["status"] = "running"
+    try:
+        result = await run_in_threadpool(process_uploaded_audio, temp_path, audio_sha256, quality)
+        doc = _call_doc(result, timestamp, audio_sha256)
+        entry["call_id"] = doc["call_id"]
+        await buffer.add(doc, entry)
+        return {"call_id": doc["call_id"]}
+
+    finally:
+        uploads.remove_quietly(temp_path)
+
+
+async def _run_batch(batch, items, batch_ts, archives, quality=None):
+    """
+    Feed a batch into the job queue, holding at most BULK_CONCURRENCY
+    slots so interactive uploads keep getting through. Archive members
+    are extracted one at a time, just before they're queued.
+    """
+    buffer = bulk.CallBuffer(_store_calls)
+    slots = asyncio.Semaphore(bulk.BULK_CONCURRENCY)
+    waiters = []
+
+    async def follow(entry, job_id):
+        try:
+            await job_queue.wait(job_id)
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+        finally:
+            slots.release()
+
+    try:
+        for i, (entry, (temp_path, audio_sha256, member)) in enumerate(zip(batch["files"], items)):
+            await slots.acquire()
+            timestamp = f"{batch_ts}_{i}"
+            try:
+                if member is not None:
+                    archive_path, info = member
+                    temp_path = uploads.temp_path_for(info.filename, timestamp)
+                    _, audio_sha256 = await run_in_threadpool(bulk.extract_member, archive_path, info, temp_path)
+
+                cost = await _probe(temp_path)
+                while True:
+                    try:
+                        job_id = job_queue.submit(
+                            _process_batch_file, entry, temp_path, timestamp, audio_sha256, quality, buffer,
+                            cost=cost,
+                        )
+                        break
+                    except QueueFull:
+                        await asyncio.sleep(1)
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+                uploads.remove_quietly(temp_path)
+                slots.release()
+                continue
+
+            entry["status"] = "queued"
+            waiters.append(asyncio.create_task(follow(entry, job_id)))
+
+        await asyncio.gather(*waiters)
+        await buffer.flush()
+
+    finally:
+        for entry, (temp_path, _, _) in zip(batch["files"], items):
+            if entry["status"] == "pending":
+                uploads.remove_quietly(temp_path)
+        for path in archives:
+            uploads.remove_quietly(path)
+        batch["status"] = "done"
+        batch["finished_at"] = time.time()
+
+
+@app.post("/process-audio/bulk")
+async def process_audio_bulk(
+    files: List[UploadFile] = File(...),
+    quality: str = Query("balanced", pattern=QUALITY_HINTS),
+):
+    """
+    Many recordings in one request: several `files` parts, zip archives
+    of them, or both. Responds 202 with a batch_id at once; per-file
+    status is at /batches/{batch_id}.
+    """
+    batch_ts = _stamp()
+    names, items, archives = [], [], []   # items: (temp_path, sha256, (archive, ZipInfo) | None)
+    try:
+        for i, file in enumerate(files):
+            temp_path = uploads.temp_path_for(file.filename, f"{batch_ts}_upload{i}")
+            if bulk.is_archive(file.filename):
+                archives.append(temp_path)
+                await uploads.save_upload(file, temp_path, max_bytes=bulk.MAX_ARCHIVE_MB * 1024 * 1024)
+                try:
+                    members = await run_in_threadpool(bulk.archive_members, temp_path)
+                except zipfile.BadZipFile:
+                    raise HTTPException(status_code=400, detail=f"{file.filename} is not a valid zip archive")
+                for info in members:
+                    names.append(info.filename)
+                    items.append((None, None, (temp_path, info)))
+            else:
+                _, audio_sha256 = await uploads.save_upload(file, temp_path)
+                names.append(file.filename)
+                items.append((temp_path, audio_sha256, None))
+
+            if len(items) > bulk.BULK_MAX_FILES:
+                raise HTTPException(status_code=413, detail=f"More than {bulk.BULK_MAX_FILES} files in one batch")
+
+        if not items:
+            raise HTTPException(status_code=400, detail="No audio files in the request")
+
+    except BaseException as e:
+        for temp_path, _, _ in items:
+            uploads.remove_quietly(temp_path)
+        for path in archives:
+            uploads.remove_quietly(path)
+        if isinstance(e, UploadTooLarge):
+            raise HTTPException(status_code=413, detail=str(e))
+        raise
+
+    batch = batches.create(names)
+    batches.run(_run_batch(batch, items, batch_ts, archives, quality))
+
+    return JSONResponse(
+        status_code=202,
+        content={"status": "queued", "batch_id": batch["batch_id"], "total": len(items)},
+    )
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    batch = batches.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+# -------------------------------------------------------
+# LIVE TRANSCRIPTION
+# -------------------------------------------------------
+_live_tasks = set()
+
+async def _store_live(session, timestamp):
+    """Finish the transcript, run the text analytics and store the call."""
+    try:
+        transcript = await run_in_threadpool(session.finish)
+        result = await run_in_threadpool(
+            process_transcript, f"live_{timestamp}", transcript, session.seconds, session.model_name
+        )
+        doc = _call_doc(result, timestamp)
+        await _store_calls([doc])
+        return doc, result
+    except Exception as e:
+        print("❌ Live call not stored:", e)
+        raise
+
+
+@app.websocket("/ws/transcribe")
+async def ws_transcribe(websocket: WebSocket, sample_rate: int = 16000):
+    """
+    Binary frames: 16-bit little-endian mono PCM at `sample_rate`.
+    Text frame {"type": "stop"} ends the call.
+
+    Sends {"type": "partial", stable, tentative, intents, sentiment,
+    converted, seconds} every STREAM_STEP_SECONDS of audio, then
+    {"type": "final", call_id, ...} once the call is stored like a
+    /process-audio upload. A dropped connection still stores the call.
+    """
+    if not 8000 <= sample_rate <= 48000:
+        await websocket.close(code=1003)
+        return
+
+    await websocket.accept()
+    timestamp = _stamp()
+    session = streaming.LiveTranscriber(sample_rate=sample_rate)
+    connected = True
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes"):
+                if session.feed(message["bytes"]):
+                    await websocket.send_json(await run_in_threadpool(session.step))
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = {}
+                if control.get("type") == "stop":
+                    break
+    except WebSocketDisconnect:
+        connected = False
+
+    if not session.samples:
+        if connected:
+            await websocket.close()
+        return
+
+    # shielded: the call is stored even if the connection handler is cancelled
+    task = asyncio.ensure_future(_store_live(session, timestamp))
+    _live_tasks.add(task)
+    task.add_done_callback(_live_tasks.discard)
+    try:
+        doc, result = await asyncio.shield(task)
+    except Exception as e:
+        if connected:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(code=1011)
+        return
+
+    if connected:
+        await websocket.send_json({
+            "type": "final",
+            "call_id": doc["call_id"],
+            "transcript": doc["transcript"],
+            "summary": doc["summary"],
+            "sentiment": doc["sentiment"],
+            "intents": result.get("intents", []),
+            "converted": doc["converted"],
+            "seconds": session.seconds,
+        })
+        await websocket.close()
+
+# -------------------------------------------------------
+# JOB STATUS
+# -------------------------------------------------------
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        **job,
+        "queue_depth": job_queue.depth,
+        "in_flight": job_queue.in_flight,
+    }
+
 # -------------------------------------------------------
 # SUMMARY STATS
 # -------------------------------------------------------
 @app.get("/stats/summary")
 async def get_summary():
+    return await stats_cache.get_or_compute("summary", _compute_summary)
+
+async def _compute_summary():
     db = mongodb.get_db()
 
-    total_calls = await db.calls.count_documents({})
-    positive_calls = await db.calls.count_documents({"sentiment": "positive"})
+    # Served from the daily rollups, not a scan of db.calls
+    total_calls, positive_calls = await rollups.summary(db)
 
     rate = round((positive_calls / total_calls) * 100, 2) if total_calls > 0 else 0
 
@@ -153,33 +604,18 @@ async def get_summary():
 # -------------------------------------------------------
 @app.get("/stats/weekly")
 async def get_weekly_stats():
+    return await stats_cache.get_or_compute("weekly", _compute_weekly_stats)
+
+async def _compute_weekly_stats():
     db = mongodb.get_db()
     start_week = start_of_current_week()
     now = datetime.utcnow()
 
-    # Weekly counts
-    total = await db.calls.count_documents({"created_at": {"$gte": start_week}})
-    positive = await db.calls.count_documents(
-        {"created_at": {"$gte": start_week}, "sentiment": "positive"}
-    )
+    # Weekly rollup already counts each topic once per call
+    total, positive, trending = await rollups.week(db, now)
 
     rate = round((positive / total) * 100, 2) if total > 0 else 0
 
-    # -------------------------------------------------------
-    # ⭐ FIX: Count each topic only ONCE per call
-    # -------------------------------------------------------
-    pipeline = [
-        {"$match": {"created_at": {"$gte": start_week}}},
-        {"$project": {"tags": 1}},  
-        {"$project": {"unique_tags": {"$setUnion": ["$tags", []]}}},  # remove duplicates inside call
-        {"$unwind": "$unique_tags"},  
-        {"$group": {"_id": "$unique_tags", "count": {"$sum": 1}}},  # count 1 per call
-        {"$sort": {"count": -1}},
-        {"$limit": 10}
-    ]
-
-    trending = await db.calls.aggregate(pipeline).to_list(length=10)
-
     return {
         "period": "current_week",
         "week_start": start_week.isoformat() + "Z",
@@ -193,27 +629,31 @@ async def get_weekly_stats():
 # -------------------------------------------------------
 # CALLS (CURRENT WEEK ONLY)
 # -------------------------------------------------------
+# List endpoints leave out the heavy fields; GET /calls/{call_id} has them
+LIST_PROJECTION = {"transcript": 0, "segments": 0, "analysis_raw": 0}
+
 @app.get("/calls")
-async def get_calls(limit: int = 50, skip: int = 0):
+async def get_calls(limit: int = 50, cursor: Optional[str] = None):
+    """
+    One page of this week's calls, newest first. Pass the X-Next-Cursor
+    response header back as `cursor` for the next page; it is absent on
+    the last page.
+    """
     db = mongodb.get_db()
     start_week = start_of_current_week()
 
-    cursor = (
-        db.calls.find({"created_at": {"$gte": start_week}})
-        .sort("created_at", -1)
-        .skip(skip)
-        .limit(limit)
+    try:
+        docs, next_cursor = await pagination.fetch_page(
+            db.calls, {"created_at": {"$gte": start_week}}, limit, cursor, LIST_PROJECTION
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return StreamingResponse(
+        pagination.iter_json_array(docs), media_type="application/json", headers=headers
     )
 
-    results = []
-    async for d in cursor:
-        d["_id"] = None
-        if isinstance(d.get("created_at"), datetime):
-            d["created_at"] = d["created_at"].isoformat() + "Z"
-        results.append(d)
-
-    return results
-
 # -------------------------------------------------------
 # SINGLE CALL
 # -------------------------------------------------------
@@ -231,91 +671,31 @@ async def get_call(call_id: str):
 
     return doc
 
-@app.get("/stats/weekly")
-async def get_weekly_stats():
-    db = mongodb.get_db()
-    start_week = start_of_current_week()
-    now = datetime.utcnow()
-
-    # ---------------------------
-    # Weekly call counts
-    # ---------------------------
-    total = await db.calls.count_documents({
-        "created_at": {"$gte": start_week}
-    })
-
-    positive = await db.calls.count_documents({
-        "created_at": {"$gte": start_week},
-        "sentiment": "positive"
-    })
-
-    rate = round((positive / total) * 100, 2) if total > 0 else 0
-
-    # ---------------------------
-    # ⭐ FINAL FIXED TRENDING TOPICS ⭐
-    # ---------------------------
-    # Guarantee:
-    #   - Only calls from this week
-    #   - Only unique topics per call
-    #   - Total topic count can NEVER exceed total calls
-    #
-    pipeline = [
-        {"$match": {"created_at": {"$gte": start_week}}},
-        
-        # remove duplicates inside a single call (e.g., ["billing","billing"])
-        {"$project": {"unique_tags": {"$setUnion": ["$tags", []]}}},
-        
-        {"$unwind": "$unique_tags"},
-
-        # group by tag but count only 1 per call
-        {"$group": {
-            "_id": "$unique_tags",
-            "count": {"$sum": 1}
-        }},
-
-        {"$sort": {"count": -1}},
-        {"$limit": 10}
-    ]
-
-    trending = await db.calls.aggregate(pipeline).to_list(length=10)
-
-    # Extra safety: ensure count never exceeds weekly total calls
-    for t in trending:
-        if t["count"] > total:
-            t["count"] = total
-
-    return {
-        "period": "current_week",
-        "week_start": start_week.isoformat() + "Z",
-        "week_end": now.isoformat() + "Z",
-        "total_calls": total,
-        "positive_calls": positive,
-        "conversion_rate": rate,
-        "topics": trending
-    }
-    # -------------------------------------------------------
+# -------------------------------------------------------
 # NEW API → GET CALLS BY TOPIC
 # -------------------------------------------------------
 @app.get("/calls/topic/{topic_name}")
-async def get_calls_by_topic(topic_name: str):
+async def get_calls_by_topic(topic_name: str, limit: int = 50, cursor: Optional[str] = None):
+    """One page of this week's calls tagged `topic_name`; `count` is the page size."""
     db = mongodb.get_db()
     start_week = start_of_current_week()
 
-    cursor = (
-        db.calls.find({
-            "created_at": {"$gte": start_week},
-            "tags": topic_name
-        }).sort("created_at", -1)
-    )
-
-    results = []
-    async for doc in cursor:
-        doc["_id"] = None
-        if isinstance(doc.get("created_at"), datetime):
-            doc["created_at"] = doc["created_at"].isoformat() + "Z"
-        results.append(doc)
-
-    return {"topic": topic_name, "count": len(results), "calls": results}
+    try:
+        docs, next_cursor = await pagination.fetch_page(
+            db.calls,
+            {"created_at": {"$gte": start_week}, "tags": topic_name},
+            limit, cursor, LIST_PROJECTION,
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def body():
+        head = {"topic": topic_name, "count": len(docs), "next_cursor": next_cursor}
+        yield json.dumps(head, ensure_ascii=False)[:-1] + ',"calls":'
+        yield from pagination.iter_json_array(docs)
+        yield "}"
+
+    return StreamingResponse(body(), media_type="application/json")
 
 # -------------------------------------------------------
 # RUN
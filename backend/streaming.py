@@ -0,0 +1,158 @@
+# streaming.py
+import os
+
+import numpy as np
+
+import model_registry
+import preprocess
+import vocabulary
+from jobs import stage
+from keyword_matcher import group_hits
+from process_audio import (
+    normalize_language,
+    tag_transcript,
+    intents_from_hits,
+    sentiment_from_hits,
+    converted_from_hits,
+)
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+# Live calls get their own (smaller) model, loaded into a pool of its
+# own, so they never queue behind an upload's transcription for a copy,
+# even when routing sends uploads to the same model.
+STREAM_MODEL = os.environ.get("STREAM_MODEL", "base")
+LIVE_POOL = "live"
+STREAM_STEP_SECONDS = float(os.environ.get("STREAM_STEP_SECONDS", "2"))   # new audio between decodes
+STREAM_PAUSE_SECONDS = 0.6     # a pause this long ends a stable stretch
+STREAM_MAX_WINDOW_SECONDS = 25  # force a commit before Whisper's 30 s window fills
+PROMPT_CHARS = 200              # stable text fed back as context
+MIN_TRANSCRIBE_SECONDS = 0.5    # shorter audio isn't sent to the model
+
+SAMPLE_RATE = preprocess.SAMPLE_RATE
+
+# -----------------------------------------
+# AUDIO
+# -----------------------------------------
+def pcm16_to_float(data, sample_rate=SAMPLE_RATE):
+    """Little-endian 16-bit mono PCM -> float32 at 16 kHz."""
+    audio = np.frombuffer(data[: len(data) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+    if sample_rate != SAMPLE_RATE and len(audio):
+        n = int(round(len(audio) * SAMPLE_RATE / sample_rate))
+        audio = np.interp(
+            np.linspace(0, len(audio) - 1, n), np.arange(len(audio)), audio
+        ).astype(np.float32)
+    return audio
+
+
+def _commit_point(audio):
+    """
+    Sample index up to which `audio` is stable: the middle of the last
+    pause of STREAM_PAUSE_SECONDS, else (once the window is full) its
+    quietest frame, else None.
+    """
+    frame = int(SAMPLE_RATE * preprocess.FRAME_SECONDS)
+    silent = preprocess.silent_frames(audio)
+
+    edges = np.diff(np.concatenate([[0], silent.astype(np.int8), [0]]))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    pauses = np.flatnonzero(ends - starts >= int(STREAM_PAUSE_SECONDS / preprocess.FRAME_SECONDS))
+    if len(pauses):
+        last = pauses[-1]
+        return ((starts[last] + ends[last]) // 2) * frame
+
+    if len(audio) >= STREAM_MAX_WINDOW_SECONDS * SAMPLE_RATE:
+        rms = preprocess.frame_rms(audio, frame)
+        return (int(np.argmin(rms[len(rms) // 2:])) + len(rms) // 2) * frame
+    return None
+
+# -----------------------------------------
+# SESSION
+# -----------------------------------------
+class LiveTranscriber:
+    """
+    Transcript of one live call, fed PCM chunks as they arrive.
+
+    Audio up to the latest pause is transcribed once and becomes stable
+    text; what follows is re-transcribed on every step as a tentative
+    tail. Keyword hits of the stable text accumulate, so intents and
+    sentiment update without rescanning the whole call. Not thread
+    safe: feed() and step() are called from one connection, in turn.
+    """
+
+    def __init__(self, model_name=STREAM_MODEL, sample_rate=SAMPLE_RATE, vocab=None):
+        self.model_name = model_name
+        self.sample_rate = sample_rate
+        self.vocab = vocab or vocabulary.current()
+        self.pending = np.zeros(0, dtype=np.float32)   # audio after the last commit
+        self.samples = 0
+        self.new_samples = 0
+        self.stable = []
+        self.tentative = ""
+        self.grouped = {}
+
+    @property
+    def seconds(self):
+        return round(self.samples / SAMPLE_RATE, 2)
+
+    @property
+    def text(self):
+        return " ".join(t for t in self.stable if t)
+
+    def feed(self, data):
+        """Append a PCM16 chunk; True when enough new audio arrived for a step()."""
+        audio = pcm16_to_float(data, self.sample_rate)
+        self.pending = np.concatenate([self.pending, audio])
+        self.samples += len(audio)
+        self.new_samples += len(audio)
+        return self.new_samples >= STREAM_STEP_SECONDS * SAMPLE_RATE
+
+    def step(self):
+        """Commit up to the last pause, re-transcribe the rest; returns a partial update."""
+        self.new_samples = 0
+        cut = _commit_point(self.pending)
+        # a short word before a pause waits for the next pause instead of being dropped
+        if cut and self._commit(self.pending[:cut]):
+            self.pending = self.pending[cut:]
+        self.tentative = self._transcribe(self.pending)
+        return self.snapshot("partial")
+
+    def finish(self):
+        """Commit whatever is left; returns the full transcript."""
+        self._commit(self.pending)
+        self.pending = self.pending[:0]
+        self.tentative = ""
+        return self.text
+
+    def snapshot(self, kind):
+        return {
+            "type": kind,
+            "stable": self.text,
+            "tentative": self.tentative,
+            "intents": intents_from_hits(self.grouped, self.vocab),
+            "sentiment": sentiment_from_hits(self.grouped),
+            "converted": converted_from_hits(self.grouped),
+            "seconds": self.seconds,
+        }
+
+    def _commit(self, audio):
+        """Make `audio` stable text; False (nothing consumed) when it is too short to transcribe."""
+        if len(audio) < MIN_TRANSCRIBE_SECONDS * SAMPLE_RATE and not preprocess.silent_frames(audio).all():
+            return False
+        text = self._transcribe(audio)
+        if not text:
+            return True
+        self.stable.append(text)
+        hits = tag_transcript(normalize_language(text, self.vocab), self.vocab)
+        for group, found in group_hits(hits).items():
+            self.grouped.setdefault(group, []).extend(found)
+        return True
+
+    def _transcribe(self, audio):
+        if len(audio) < MIN_TRANSCRIBE_SECONDS * SAMPLE_RATE or preprocess.silent_frames(audio).all():
+            return ""
+        prompt = self.text[-PROMPT_CHARS:] or None
+        with stage("live_transcribe"), model_registry.acquire(self.model_name, pool=LIVE_POOL) as model:
+            result = model.transcribe(audio, initial_prompt=prompt)
+        return (result.get("text") or "").strip()
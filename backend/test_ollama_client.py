@@ -0,0 +1,100 @@
+# test_ollama_client.py
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ollama_client
+
+# -----------------------------------------
+# STUB SERVER
+# -----------------------------------------
+CHUNKS = [{"response": "Hello"}, {"response": " world"}, {"response": "", "done": True}]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # set per test: "keep-alive", "close", "http10", "error"
+    mode = "keep-alive"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.mode == "error":
+            self.send_response(500)
+            self.send_header("Content-Length", "4")
+            self.end_headers()
+            self.wfile.write(b"boom")
+            return
+
+        body = b"".join(json.dumps(c).encode() + b"\n" for c in CHUNKS)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        if self.mode == "keep-alive":
+            self.send_header("Content-Length", str(len(body)))
+        else:
+            # no length: the body ends when the server closes the socket
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class OllamaClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.breaker = ollama_client.CircuitBreaker(failures=2, cooldown=60)
+        self.client = ollama_client.OllamaClient(
+            url=f"http://127.0.0.1:{self.server.server_port}",
+            deadline=5,
+            breaker=self.breaker,
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve(self, mode, protocol="HTTP/1.1"):
+        _Handler.mode = mode
+        _Handler.protocol_version = protocol
+
+    def test_keep_alive_reuses_connection(self):
+        self.serve("keep-alive")
+        self.assertEqual(self.client.generate("hi"), "Hello world")
+        self.assertEqual(self.client.generate("hi"), "Hello world")
+        self.assertEqual(self.client._pool.qsize(), 1)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_connection_close(self):
+        self.serve("close")
+        for _ in range(3):
+            self.assertEqual(self.client.generate("hi"), "Hello world")
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_http10(self):
+        self.serve("close", protocol="HTTP/1.0")
+        self.assertEqual(self.client.generate("hi"), "Hello world")
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_errors_open_the_circuit(self):
+        self.serve("error")
+        for _ in range(2):
+            with self.assertRaises(ollama_client.OllamaUnavailable):
+                self.client.generate("hi")
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaisesRegex(ollama_client.OllamaUnavailable, "circuit open"):
+            self.client.generate("hi")
+
+    def test_unexpected_exception_counts_as_failure(self):
+        self.serve("keep-alive")
+        self.client._send = lambda *a: (_ for _ in ()).throw(AttributeError("sock"))
+        for _ in range(2):
+            with self.assertRaises(ollama_client.OllamaUnavailable):
+                self.client.generate("hi")
+        self.assertEqual(self.breaker.state, "open")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+# uploads.py
+import os
+import json
+import time
+import hashlib
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+UPLOAD_TMP_DIR = os.environ.get("UPLOAD_TMP_DIR", "tmp")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_MB = int(os.environ.get("MAX_UPLOAD_MB", "500"))
+FORM_OVERHEAD_BYTES = 64 * 1024   # multipart boundaries + part headers around the file
+STALE_UPLOAD_SECONDS = 6 * 3600
+
+
+class UploadTooLarge(Exception):
+    pass
+
+# -----------------------------------------
+# HELPERS
+# -----------------------------------------
+def temp_path_for(filename, timestamp):
+    # basename() keeps client-supplied names from escaping the temp dir
+    name = os.path.basename(filename or "upload")
+    return os.path.join(UPLOAD_TMP_DIR, f"temp_{timestamp}_{name}")
+
+
+async def save_upload(file, dest, max_bytes=None):
+    """
+    Copy an UploadFile to `dest` in fixed-size chunks, hashing as it goes.
+    Returns (size_bytes, sha256_hex). Removes the partial file and raises
+    UploadTooLarge once the size limit is crossed. Starlette has already
+    spooled the whole part by now; BodySizeLimit is what stops an
+    oversized request while it is still arriving.
+    """
+    limit = max_bytes if max_bytes is not None else MAX_UPLOAD_MB * 1024 * 1024
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest, "wb") as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge(f"Upload exceeds {limit // (1024 * 1024)} MB")
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        remove_quietly(dest)
+        raise
+
+    return size, digest.hexdigest()
+
+
+class BodySizeLimit:
+    """
+    ASGI middleware capping request bodies per path ({path: max_bytes})
+    before the form is parsed: 413 straight away when Content-Length is
+    over the limit, and as soon as a chunked body crosses it, so an
+    oversized upload is never received (or spooled to disk) in full.
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        limit += FORM_OVERHEAD_BYTES
+        detail = f"Upload exceeds {(limit - FORM_OVERHEAD_BYTES) // (1024 * 1024)} MB"
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b""))
+        except ValueError:
+            declared = None
+        if declared is not None and declared > limit:
+            return await _reject(send, detail)
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise UploadTooLarge(detail)
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded:
+                # whatever error the app made of the aborted read becomes a 413
+                if message["type"] == "http.response.start" and not started:
+                    started = True
+                    await _reject(send, detail)
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            if not started:
+                await _reject(send, detail)
+
+
+async def _reject(send, detail):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def remove_quietly(path):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print("⚠️ Could not remove temp file:", path, e)
+
+
+def sweep_stale(max_age=STALE_UPLOAD_SECONDS):
+    """Delete temp uploads left behind by a crashed worker."""
+    if not os.path.isdir(UPLOAD_TMP_DIR):
+        return 0
+
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in os.listdir(UPLOAD_TMP_DIR):
+        path = os.path.join(UPLOAD_TMP_DIR, name)
+        if name.startswith("temp_") and os.path.getmtime(path) < cutoff:
+            remove_quietly(path)
+            removed += 1
+    return removed
@@ -0,0 +1,104 @@
+# vocabulary.py
+import os
+import json
+import time
+import threading
+
+from keyword_matcher import KeywordMatcher
+
+# -----------------------------------------
+# CONFIG
+# -----------------------------------------
+VOCAB_FILE = os.environ.get(
+    "VOCAB_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vocab", "vocabulary.json"),
+)
+VOCAB_CHECK_SECONDS = float(os.environ.get("VOCAB_CHECK_SECONDS", "5"))
+
+REQUIRED_KEYS = ("version", "hindi_map", "intents", "sentiment", "conversion", "summary")
+
+# -----------------------------------------
+# COMPILED SNAPSHOT
+# -----------------------------------------
+class Vocabulary:
+    """
+    One version of the keyword vocabularies, compiled into matchers.
+    Never mutated after construction: a reload builds a new instance and
+    swaps the module-level reference, so in-flight calls keep a
+    consistent view.
+    """
+
+    def __init__(self, data):
+        missing = [k for k in REQUIRED_KEYS if k not in data]
+        if missing:
+            raise ValueError(f"vocabulary missing keys: {', '.join(missing)}")
+
+        self.version = str(data["version"])
+        self.hindi_map = {k.lower(): v.lower() for k, v in data["hindi_map"].items()}
+        self.intents = {i: [k.lower() for k in kws] for i, kws in data["intents"].items()}
+        self.sentiment = {s: [k.lower() for k in kws] for s, kws in data["sentiment"].items()}
+        self.conversion = [k.lower() for k in data["conversion"]]
+        self.summary = {s: [k.lower() for k in kws] for s, kws in data["summary"].items()}
+
+        self.normalizer = KeywordMatcher({"hindi": self.hindi_map})
+        self.matcher = KeywordMatcher({
+            **{"intent:" + intent: kws for intent, kws in self.intents.items()},
+            **{"sentiment:" + label: kws for label, kws in self.sentiment.items()},
+            "conversion": self.conversion,
+            **{"summary:" + section: kws for section, kws in self.summary.items()},
+        })
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+# -----------------------------------------
+# HOT RELOAD
+# -----------------------------------------
+_current = None
+_mtime = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def reload(force=False):
+    """
+    Recompile if the file changed since the last load. A broken file is
+    reported and ignored; the previous version stays active.
+    """
+    global _current, _mtime, _checked_at
+
+    with _lock:
+        _checked_at = time.monotonic()
+        try:
+            mtime = os.path.getmtime(VOCAB_FILE)
+        except OSError as e:
+            if _current is None:
+                raise
+            print("⚠️ Vocabulary file unavailable, keeping", _current.version, e)
+            return _current
+
+        if not force and _current is not None and mtime == _mtime:
+            return _current
+
+        try:
+            vocab = Vocabulary.from_file(VOCAB_FILE)
+        except Exception as e:
+            if _current is None:
+                raise
+            _mtime = mtime   # don't re-parse the same broken file every check
+            print("❌ Vocabulary reload failed, keeping", _current.version, e)
+            return _current
+
+        _current, _mtime = vocab, mtime
+        print(f"✅ Vocabulary v{vocab.version} loaded")
+        return vocab
+
+
+def current():
+    """Active vocabulary; checks the file for changes at most every VOCAB_CHECK_SECONDS."""
+    vocab = _current
+    if vocab is None or time.monotonic() - _checked_at >= VOCAB_CHECK_SECONDS:
+        vocab = reload()
+    return vocab
@@ -50,7 +50,7 @@ function mapApiCallToInteraction(apiCall: CallFromAPI): CallInteraction {
     sentiment: apiCall.sentiment || "neutral",
     tags: apiCall.tags || [],
     summary: apiCall.summary || "",
-    transcript: apiCall.transcript || "",
+    // not in list responses; CallDetail loads it from /calls/{id}
     emotion: apiCall.emotion || "",
     analysis: apiCall.analysis,
   };
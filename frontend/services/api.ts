@@ -27,13 +27,14 @@ export const api = {
   // ---------------- Existing methods ----------------
 
   /**
-   * GET all calls
+   * GET all calls (one page; pass the X-Next-Cursor header back as `cursor`)
    */
   getAllCalls: async (
     limit = 200,
-    skip = 0
+    cursor?: string
   ): Promise<CallFromAPI[]> => {
-    const res = await fetch(`${BASE}/calls?limit=${limit}&skip=${skip}`);
+    const query = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await fetch(`${BASE}/calls?limit=${limit}${query}`);
     return handleJSON(res);
   },
 
@@ -60,6 +61,30 @@ export const api = {
     return handleJSON(res);
   },
 
+  /**
+   * Upload many recordings (or .zip archives of them) as one batch
+   * → { batch_id }; poll getBatch() for per-file status
+   */
+  uploadAudioBulk: async (files: File[]) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append("files", file));
+
+    const res = await fetch(`${BASE}/process-audio/bulk`, {
+      method: "POST",
+      body: formData,
+    });
+
+    return handleJSON(res);
+  },
+
+  /**
+   * GET bulk batch status
+   */
+  getBatch: async (batchId: string) => {
+    const res = await fetch(`${BASE}/batches/${encodeURIComponent(batchId)}`);
+    return handleJSON(res);
+  },
+
   /**
    * Optional backend ping
    */
@@ -83,7 +83,7 @@ export interface APIAnalysisResponse {
   sentiment: string;
   tags: string[];
   summary: string;
-  transcript: string;
+  transcript?: string;
   emotion?: string;
   analysis?: any;
   converted?: boolean;
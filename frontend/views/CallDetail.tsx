@@ -39,17 +39,18 @@ const CallDetail: React.FC<CallDetailProps> = ({
   const [error, setError] = useState<string | null>(null);
 
   // ------------------------------------------------------------------------------
-  // FETCH CALL IF NOT FOUND IN LOCAL INTERACTIONS
+  // FETCH FULL CALL (list items from /calls leave out the transcript)
   // ------------------------------------------------------------------------------
   useEffect(() => {
-    if (call) return; // already loaded from App state
+    if (call && call.transcript) return; // already loaded
 
     const load = async () => {
       try {
-        setLoading(true);
+        if (!call) setLoading(true);
         const apiCall: CallFromAPI = await api.getCallById(callId);
 
-        setCall({
+        setCall((prev) => ({
+          ...prev,
           id: apiCall.call_id,
           callId: apiCall.call_id,
           customerName: apiCall.customer_id || "Unknown Customer",
@@ -64,7 +65,7 @@ const CallDetail: React.FC<CallDetailProps> = ({
           transcript: apiCall.transcript,
           emotion: apiCall.emotion,
           analysis: apiCall.analysis,
-        });
+        }));
       } catch (err: any) {
         console.error(err);
         setError("Failed to load call details.");
@@ -74,7 +75,7 @@ const CallDetail: React.FC<CallDetailProps> = ({
     };
 
     load();
-  }, [call, callId]);
+  }, [callId]);
 
   // ------------------------------------------------------------------------------
   // HANDLE LOADING / ERROR